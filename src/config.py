@@ -1,12 +1,63 @@
 """Shopify VAT Invoice Scraper - Configuration"""
-from pydantic_settings import BaseSettings
-from pydantic import field_validator
+from pydantic_settings import (
+    BaseSettings,
+    DotEnvSettingsSource,
+    PydanticBaseSettingsSource,
+    SettingsConfigDict,
+)
+from pydantic import PrivateAttr, computed_field, field_validator, model_validator
+from functools import cache, cached_property, lru_cache
 from pathlib import Path
+from typing import Any, Mapping, Optional
+import os
+
+
+# Parsed .env files: resolved path -> (stamp, values), where stamp covers the
+# file's mtime and every option _read_env_file passes to the parser
+_env_file_cache: dict[str, tuple[tuple, Mapping[str, Optional[str]]]] = {}
+
+
+class CachedDotEnvSettingsSource(DotEnvSettingsSource):
+    """Dotenv source that only re-parses a .env file when it changes on disk."""
+    
+    # Overrides a private pydantic-settings hook - requirements.txt pins the
+    # 2.x range where its signature and parser options match this override
+    def _read_env_file(self, file_path: Path) -> Mapping[str, Optional[str]]:
+        if not file_path.is_file():
+            return super()._read_env_file(file_path)
+        
+        path = str(file_path.resolve())
+        stamp = (
+            file_path.stat().st_mtime_ns,
+            self.env_file_encoding,
+            self.case_sensitive,
+            self.env_ignore_empty,
+            self.env_parse_none_str,
+        )
+        cached = _env_file_cache.get(path)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, super()._read_env_file(file_path))
+            _env_file_cache[path] = cached
+        return cached[1]
+
+
+@cache
+def _make_directories(dir_paths: tuple[str, ...]) -> None:
+    """Create the given directories - runs once per distinct set of paths."""
+    for dir_path in dir_paths:
+        if not os.path.isdir(dir_path):
+            os.makedirs(dir_path, exist_ok=True)
 
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
     
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        frozen=True,
+    )
+    
     # Shopify Admin settings
     store_slug: str = ""  # Required: Your Shopify store identifier (e.g., "my-store")
     admin_base_url: str = "https://admin.shopify.com"
@@ -24,6 +75,8 @@ class Settings(BaseSettings):
     
     # Browser settings
     headless: bool = False  # Headed mode required for login and reliability
+    prewarm_browser: bool = True  # Launch browser and check session on startup
+    debug_screenshots: bool = False  # Save a screenshot when scraping an order fails
     
     # Timeouts (milliseconds)
     timeout_page_load: int = 60000  # 60 seconds for initial page load
@@ -35,17 +88,54 @@ class Settings(BaseSettings):
     retry_attempts: int = 3
     retry_delay: float = 2.0  # seconds between retries
     
+    # Batch processing
+    batch_concurrency: int = 3  # Orders scraped in parallel (one browser tab each)
+    page_recycle_after: int = 25  # Close a pooled browser tab after this many orders
+    
     # Human-like delay settings (seconds)
     human_delay_min: float = 0.5  # Minimum delay between actions
     human_delay_max: float = 2.0  # Maximum delay between actions
+    human_delay_median: float = 1.0  # Typical delay (log-normal median)
+    human_delay_sigma: float = 0.4  # Spread of the log-normal distribution
     
     # Server settings
     host: str = "0.0.0.0"
     port: int = 8000
     
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
+    # Date folders already created during this process
+    _created_date_folders: set[str] = PrivateAttr(default_factory=set)
+    
+    # Precomputed in model_post_init for the per-order hot path
+    _order_url_prefix: str = PrivateAttr(default="")
+    _download_dir_str: str = PrivateAttr(default="")
+    
+    @classmethod
+    def settings_customise_sources(
+        cls,
+        settings_cls: type[BaseSettings],
+        init_settings: PydanticBaseSettingsSource,
+        env_settings: PydanticBaseSettingsSource,
+        dotenv_settings: PydanticBaseSettingsSource,
+        file_secret_settings: PydanticBaseSettingsSource,
+    ) -> tuple[PydanticBaseSettingsSource, ...]:
+        """Use the cached .env source in place of the default dotenv source."""
+        cached_dotenv = CachedDotEnvSettingsSource(
+            settings_cls,
+            env_file=dotenv_settings.env_file,
+            env_file_encoding=dotenv_settings.env_file_encoding,
+            case_sensitive=dotenv_settings.case_sensitive,
+            env_prefix=dotenv_settings.env_prefix,
+            env_nested_delimiter=dotenv_settings.env_nested_delimiter,
+            env_ignore_empty=dotenv_settings.env_ignore_empty,
+            env_parse_none_str=dotenv_settings.env_parse_none_str,
+            env_parse_enums=dotenv_settings.env_parse_enums,
+        )
+        return init_settings, env_settings, cached_dotenv, file_secret_settings
+    
+    def model_post_init(self, __context: Any) -> None:
+        """Precompute values derived from settings that never change."""
+        self._order_url_prefix = f"{self.admin_base_url}/store/{self.store_slug}/orders/"
+        self._download_dir_str = self.download_dir.rstrip("/\\")
     
     @field_validator('store_slug')
     @classmethod
@@ -58,25 +148,42 @@ class Settings(BaseSettings):
             )
         return v.strip()
     
+    @model_validator(mode='after')
+    def human_delays_valid(self) -> "Settings":
+        if self.human_delay_sigma < 0:
+            raise ValueError("HUMAN_DELAY_SIGMA must be 0 or greater")
+        if self.human_delay_min > self.human_delay_max:
+            raise ValueError("HUMAN_DELAY_MIN must not be greater than HUMAN_DELAY_MAX")
+        if self.human_delay_median <= 0 or not (
+            self.human_delay_min <= self.human_delay_median <= self.human_delay_max
+        ):
+            raise ValueError(
+                "HUMAN_DELAY_MEDIAN must be greater than 0 and between "
+                "HUMAN_DELAY_MIN and HUMAN_DELAY_MAX"
+            )
+        return self
+    
     def ensure_directories(self) -> None:
-        """Create required directories if they don't exist."""
-        for dir_path in [self.download_dir, self.screenshot_dir, self.log_dir, self.profile_dir]:
-            Path(dir_path).mkdir(parents=True, exist_ok=True)
+        """Create required directories if they don't exist (once per process)."""
+        _make_directories((self.download_dir, self.screenshot_dir, self.log_dir, self.profile_dir))
     
-    @property
+    @computed_field
+    @cached_property
     def admin_store_url(self) -> str:
         """Get the full admin URL for the store."""
         return f"{self.admin_base_url}/store/{self.store_slug}"
     
     def get_admin_order_url(self, order_id: str) -> str:
         """Get the admin URL for a specific order."""
-        return f"{self.admin_store_url}/orders/{order_id}"
+        return self._order_url_prefix + order_id
     
     def get_date_folder(self, date_str: str) -> Path:
         """Get the download folder for a specific date (YYYY-MM-DD format)."""
-        folder = Path(self.download_dir) / date_str
-        folder.mkdir(parents=True, exist_ok=True)
-        return folder
+        folder = self._download_dir_str + "/" + date_str
+        if date_str not in self._created_date_folders:
+            os.makedirs(folder, exist_ok=True)
+            self._created_date_folders.add(date_str)
+        return Path(folder)
 
 
 def _load_settings() -> Settings:
@@ -116,4 +223,10 @@ def _load_settings() -> Settings:
         sys.exit(1)
 
 
-settings = _load_settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the process-wide settings, parsed from the environment only once."""
+    return _load_settings()
+
+
+settings = get_settings()
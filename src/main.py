@@ -4,12 +4,19 @@ This service provides HTTP endpoints for scraping VAT invoices from
 Shopify admin UI using a persistent browser session.
 """
 import os
+import queue
+import atexit
 import logging
+import logging.handlers
 from contextlib import asynccontextmanager
+from typing import Any, Optional
 
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi import Depends, FastAPI, HTTPException, Response
+from fastapi.responses import JSONResponse
+import orjson
 import uvicorn
+from pydantic import BaseModel
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from .models import (
     AdminScrapeRequest,
@@ -23,6 +30,7 @@ from .models import (
 from .scraper import (
     scrape_admin_invoice,
     scrape_invoice_with_retry,
+    scrape_many,
     cancel_scraping, 
     is_cancelled, 
     reset_cancel,
@@ -35,105 +43,236 @@ from .scraper import (
     show_status_page,
     is_browser_running,
 )
-from .config import settings
+from .config import Settings, get_settings, settings
+
+
+# Background listener that owns the blocking log handlers
+_log_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
 
 
 # Configure logging
 def setup_logging():
-    """Configure application logging."""
+    """
+    Configure application logging.
+    
+    Log records are handed to a queue and written to file/console by a
+    background thread, so logging never blocks the event loop.
+    """
+    global _log_listener, _queue_handler
+    
     settings.ensure_directories()
     
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     log_file = os.path.join(settings.log_dir, 'scraper.log')
     
+    formatter = logging.Formatter(log_format)
+    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    
+    log_queue = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    # Only merge args here - the listener's handlers apply the real format
+    _queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    
     logging.basicConfig(
         level=logging.INFO,
-        format=log_format,
-        handlers=[
-            logging.FileHandler(log_file, encoding='utf-8'),
-            logging.StreamHandler()
-        ]
+        handlers=[_queue_handler]
+    )
+    
+    _log_listener = logging.handlers.QueueListener(
+        log_queue, file_handler, stream_handler, respect_handler_level=True
     )
+    _log_listener.start()
+    atexit.register(stop_logging)
     
     # Reduce noise from external libraries
     logging.getLogger('httpx').setLevel(logging.WARNING)
     logging.getLogger('httpcore').setLevel(logging.WARNING)
 
 
+def start_logging():
+    """Route logging through the queue again after stop_logging() (no-op if running)."""
+    root = logging.getLogger()
+    if _log_listener is None or _queue_handler in root.handlers:
+        return
+    
+    root.addHandler(_queue_handler)
+    for handler in _log_listener.handlers:
+        root.removeHandler(handler)
+    _log_listener.start()
+
+
+def stop_logging():
+    """
+    Flush queued log records and stop the background log listener.
+    
+    The file/console handlers are attached to the root logger directly, so
+    records logged afterwards are still written instead of being queued
+    with nobody draining the queue.
+    """
+    root = logging.getLogger()
+    if _log_listener is None or _queue_handler not in root.handlers:
+        return
+    
+    for handler in _log_listener.handlers:
+        root.addHandler(handler)
+    root.removeHandler(_queue_handler)
+    _log_listener.stop()
+
+
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Settings are immutable after startup - resolve derived values once
+_ADMIN_STORE_URL = settings.admin_store_url
+_ABS_DOWNLOAD_DIR = os.path.abspath(settings.download_dir)
+_ABS_PROFILE_DIR = os.path.abspath(settings.profile_dir)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler for startup/shutdown."""
+    # A previous lifespan in this process may have stopped the listener
+    start_logging()
     logger.info("="*60)
     logger.info("Shopify VAT Invoice Scraper v2.0 starting...")
     logger.info(f"Store: {settings.store_slug}")
-    logger.info(f"Admin URL: {settings.admin_store_url}")
-    logger.info(f"Download directory: {os.path.abspath(settings.download_dir)}")
-    logger.info(f"Profile directory: {os.path.abspath(settings.profile_dir)}")
+    logger.info(f"Admin URL: {_ADMIN_STORE_URL}")
+    logger.info(f"Download directory: {_ABS_DOWNLOAD_DIR}")
+    logger.info(f"Profile directory: {_ABS_PROFILE_DIR}")
     logger.info(f"Headless mode: {settings.headless}")
     logger.info("="*60)
+    
+    if settings.prewarm_browser:
+        # Launch the browser now so the first scrape doesn't pay for it.
+        # Never block startup waiting for a manual login.
+        logger.info("Prewarming browser session...")
+        logged_in, _ = await ensure_logged_in(wait_for_login=False)
+        if not logged_in:
+            logger.info("Not logged in yet - call /session/check to log in")
+    
     yield
     logger.info("Shutting down - closing browser...")
     await close_browser()
     logger.info("Shopify VAT Invoice Scraper stopped.")
+    stop_logging()
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib json module."""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
 
 
 app = FastAPI(
     title="Shopify VAT Invoice Scraper",
     description="Scrapes VAT invoice PDFs from Shopify admin UI using persistent sessions",
     version="2.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
+# Fixed CORS headers - any origin, method and header, no credentials
+_CORS_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+]
+_CORS_PREFLIGHT_HEADERS = _CORS_HEADERS + [
+    (b"access-control-allow-methods", b"*"),
+    (b"access-control-allow-headers", b"*"),
+    (b"access-control-max-age", b"600"),
+    (b"content-length", b"0"),
+]
+
+
+class StaticCORSMiddleware:
+    """
+    Permissive CORS middleware with precomputed headers.
+    
+    Answers preflight requests directly and appends a fixed header block to
+    every other response, skipping the per-request origin/method/header
+    matching done by Starlette's CORSMiddleware.
+    """
+    
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        if scope["method"] == "OPTIONS" and any(
+            name == b"access-control-request-method" for name, _ in scope["headers"]
+        ):
+            await send({"type": "http.response.start", "status": 200, "headers": _CORS_PREFLIGHT_HEADERS})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        
+        async def send_with_cors(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *_CORS_HEADERS]
+            await send(message)
+        
+        await self.app(scope, receive, send_with_cors)
+
+
 # Enable CORS for browser-based requests
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+app.add_middleware(StaticCORSMiddleware)
+
+
+def _json_response(model: BaseModel) -> Response:
+    """
+    Serialize a response model directly to JSON bytes.
+    
+    Uses the model's pydantic-core serializer and bypasses FastAPI's
+    jsonable_encoder pass. The route's response_model still documents
+    the schema in OpenAPI.
+    """
+    return Response(content=model.model_dump_json(), media_type="application/json")
 
 
 @app.get("/health", response_model=HealthResponse)
-async def health_check():
+async def health_check(settings: Settings = Depends(get_settings)) -> Response:
     """Health check endpoint including session and browser status."""
-    return HealthResponse(
+    return _json_response(HealthResponse(
         status="healthy",
         headless_mode=settings.headless,
-        download_dir=os.path.abspath(settings.download_dir),
+        download_dir=_ABS_DOWNLOAD_DIR,
         session_status=get_session_status(),
         browser_running=is_browser_running()
-    )
+    ))
 
 
 @app.get("/session/status", response_model=SessionStatusResponse)
-async def get_session_status_endpoint():
+async def get_session_status_endpoint(settings: Settings = Depends(get_settings)) -> Response:
     """Get the current Shopify admin session status."""
-    return SessionStatusResponse(
+    return _json_response(SessionStatusResponse(
         status=get_session_status(),
         store_slug=settings.store_slug,
         message=_get_session_message(get_session_status())
-    )
+    ))
+
+
+_SESSION_MESSAGES: dict[SessionStatus, str] = {
+    SessionStatus.UNKNOWN: "Session status not yet checked",
+    SessionStatus.LOGGED_IN: "Logged into Shopify admin",
+    SessionStatus.LOGGED_OUT: "Not logged in",
+    SessionStatus.LOGIN_REQUIRED: "Manual login required - browser window should be open",
+    SessionStatus.CHECKING: "Checking session status...",
+}
 
 
 def _get_session_message(status: SessionStatus) -> str:
     """Get a human-readable message for session status."""
-    messages = {
-        SessionStatus.UNKNOWN: "Session status not yet checked",
-        SessionStatus.LOGGED_IN: "Logged into Shopify admin",
-        SessionStatus.LOGGED_OUT: "Not logged in",
-        SessionStatus.LOGIN_REQUIRED: "Manual login required - browser window should be open",
-        SessionStatus.CHECKING: "Checking session status...",
-    }
-    return messages.get(status, "Unknown status")
+    return _SESSION_MESSAGES.get(status, "Unknown status")
 
 
 @app.post("/session/check", response_model=SessionStatusResponse)
-async def check_session():
+async def check_session(settings: Settings = Depends(get_settings)) -> Response:
     """
     Check and ensure we're logged into Shopify admin.
     
@@ -152,11 +291,11 @@ async def check_session():
     # Show status page to indicate browser is ready and waiting
     await show_status_page()
     
-    return SessionStatusResponse(
+    return _json_response(SessionStatusResponse(
         status=SessionStatus.LOGGED_IN,
         store_slug=settings.store_slug,
         message="Successfully logged into Shopify admin"
-    )
+    ))
 
 
 @app.post("/session/login-complete")
@@ -213,7 +352,7 @@ async def show_idle_status():
 
 
 @app.post("/scrape-invoice", response_model=ScrapeResult)
-async def scrape_single_invoice(request: AdminScrapeRequest):
+async def scrape_single_invoice(request: AdminScrapeRequest) -> Response:
     """
     Scrape a single VAT invoice from Shopify admin.
     
@@ -235,74 +374,81 @@ async def scrape_single_invoice(request: AdminScrapeRequest):
     else:
         logger.error(f"Failed to scrape invoice: {result.error}")
     
-    return result
+    return _json_response(result)
 
 
 @app.post("/scrape-batch", response_model=BatchScrapeResult)
-async def scrape_batch_invoices(request: BatchScrapeRequest):
+async def scrape_batch_invoices(
+    request: BatchScrapeRequest,
+    settings: Settings = Depends(get_settings)
+) -> Response:
     """
-    Scrape multiple VAT invoices in sequence.
+    Scrape multiple VAT invoices concurrently.
     
-    Processes invoices one at a time. If login is required during processing,
-    the batch will pause and return with needs_login=True.
+    Processes up to `batch_concurrency` invoices at a time. If login is required
+    during processing, orders that haven't started yet are skipped and the
+    batch returns with needs_login=True.
     """
-    logger.info(f"Received batch scrape request for {len(request.orders)} orders")
+    orders = request.orders
+    total = len(orders)
+    logger.info(f"Received batch scrape request for {total} orders")
     
     # First ensure we're logged in
     logged_in, error = await ensure_logged_in()
     if not logged_in:
-        return BatchScrapeResult(
-            total=len(request.orders),
+        return _json_response(BatchScrapeResult(
+            total=total,
             successful=0,
-            failed=len(request.orders),
+            failed=total,
             results=[],
             needs_login=True
-        )
+        ))
     
-    results = []
+    results = await scrape_many(orders, settings.batch_concurrency)
+    
+    ordered_results: list[ScrapeResult] = []
     successful = 0
     failed = 0
+    needs_login = False
     
-    for i, order in enumerate(request.orders, 1):
-        order_desc = order.order_name or f"order {i}/{len(request.orders)}"
-        logger.info(f"Batch progress: Scraping {order_desc}...")
-        
-        result = await scrape_invoice_with_retry(
-            order.order_id, 
-            order.order_name, 
-            order.order_date
-        )
-        results.append(result)
+    for i, result in enumerate(results, 1):
+        if result is None:
+            # Skipped after the session expired
+            continue
+        ordered_results.append(result)
         
         if result.needs_login:
-            # Session expired mid-batch
-            logger.warning(f"Session expired at order {i}/{len(request.orders)}")
-            return BatchScrapeResult(
-                total=len(request.orders),
-                successful=successful,
-                failed=failed + (len(request.orders) - i),
-                results=results,
-                needs_login=True
-            )
-        
-        if result.success:
+            logger.warning(f"Session expired at order {i}/{total}")
+            needs_login = True
+        elif result.success:
             successful += 1
             logger.info(f"Batch: Successfully scraped {result.invoice_number}")
         else:
             failed += 1
-            logger.error(f"Batch: Failed to scrape {order_desc}: {result.error}")
+            logger.error(f"Batch: Failed to scrape {orders[i - 1].order_name or f'order {i}/{total}'}: {result.error}")
+    
+    if needs_login:
+        # Every order that did not succeed counts as failed, including
+        # the one that hit the login wall and the skipped remainder
+        return _json_response(BatchScrapeResult(
+            total=total,
+            successful=successful,
+            failed=total - successful,
+            results=ordered_results,
+            needs_login=True
+        ))
     
     logger.info(f"Batch complete: {successful} successful, {failed} failed")
     
     # Show status page to indicate browser is ready for next batch
     await show_status_page()
     
-    return BatchScrapeResult(
-        total=len(request.orders),
+    return _json_response(BatchScrapeResult(
+        total=total,
         successful=successful,
         failed=failed,
-        results=results
-    )
+        results=ordered_results
+    ))
 
 
 if __name__ == "__main__":
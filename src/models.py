@@ -1,6 +1,8 @@
 """Shopify VAT Invoice Scraper - Pydantic Models"""
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional
+import sys
+from datetime import datetime
 from enum import Enum
 
 
@@ -17,7 +19,25 @@ class AdminScrapeRequest(BaseModel):
     """Request to scrape a single invoice from admin UI."""
     order_id: str = Field(..., description="Shopify order ID (legacyResourceId)")
     order_name: Optional[str] = Field(None, description="Order name for logging (e.g., '#8512')")
-    order_date: Optional[str] = Field(None, description="Order date for folder organization (ISO format)")
+    order_date: Optional[datetime] = Field(
+        None,
+        description="Order date for folder organization (ISO format)",
+        json_schema_extra={"example": "2024-01-15T10:30:00Z"},
+    )
+    
+    @field_validator('order_date', mode='before')
+    @classmethod
+    def parse_iso_order_date(cls, v):
+        """Parse ISO strings with fromisoformat; a blank date means "use today"."""
+        if not isinstance(v, str):
+            return v
+        v = v.strip()
+        if not v:
+            return None
+        # Pydantic would read compact dates like "20260122" as Unix timestamps
+        if v.endswith('Z'):
+            v = v[:-1] + '+00:00'
+        return datetime.fromisoformat(v)
 
 
 class ScrapeResult(BaseModel):
@@ -33,6 +53,12 @@ class ScrapeResult(BaseModel):
     error: Optional[str] = None
     screenshot_path: Optional[str] = None
     needs_login: bool = False  # True if session expired and login is required
+    
+    @field_validator('order_name', 'invoice_date', 'shopify_order_id')
+    @classmethod
+    def intern_repeated_strings(cls, v: Optional[str]) -> Optional[str]:
+        """Share one string object for values repeated across a batch (e.g. dates)."""
+        return sys.intern(v) if v else v
 
 
 class BatchScrapeRequest(BaseModel):
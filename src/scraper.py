@@ -5,66 +5,103 @@ It uses a persistent browser profile to maintain login sessions.
 """
 import re
 import os
+import math
+import time
+import random
 import asyncio
+import functools
 import logging
-from datetime import datetime
-from typing import Optional
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Optional
 from zoneinfo import ZoneInfo
 from pathlib import Path
 
 from camoufox.async_api import AsyncCamoufox
 
 from .config import settings
-from .models import ScrapeResult, SessionStatus
+from .models import AdminScrapeRequest, ScrapeResult, SessionStatus
 
 logger = logging.getLogger(__name__)
 
-# Global state
-_cancel_requested = False
-_browser_instance = None
-_browser_context = None
-_current_session_status = SessionStatus.UNKNOWN
-_login_event = None  # Event to signal login completion
+# Occasional longer pause, like a person glancing away from the screen
+_LONG_BREAK_EVERY = (15, 25)  # calls between long breaks
+_LONG_BREAK_SECONDS = (5.0, 15.0)
+
+_RESULT_CACHE_SIZE = 1024  # Successful results remembered per process
+
+
+@dataclass
+class ScraperState:
+    """Mutable scraper state shared by the API and the scraping coroutines."""
+    cancel_requested: bool = False
+    session_status: SessionStatus = SessionStatus.UNKNOWN
+    browser: Any = None
+    context: Any = None
+    login_event: Optional[asyncio.Event] = None  # Signals login completion
+    page_pool: Optional[asyncio.Queue] = None  # Idle pages kept open for reuse
+    page_use_count: dict = field(default_factory=dict)  # Page -> orders served
+    delay_calls: int = 0
+    next_long_break: int = field(default_factory=lambda: random.randint(*_LONG_BREAK_EVERY))
+    result_cache: OrderedDict = field(default_factory=OrderedDict)  # (order_id, order_date) -> ScrapeResult
+
+
+STATE = ScraperState()
 
 
 def cancel_scraping():
     """Set the cancellation flag."""
-    global _cancel_requested
-    _cancel_requested = True
+    STATE.cancel_requested = True
 
 
 def is_cancelled() -> bool:
     """Check if cancellation was requested."""
-    return _cancel_requested
+    return STATE.cancel_requested
 
 
 def reset_cancel():
     """Reset the cancellation flag."""
-    global _cancel_requested
-    _cancel_requested = False
+    STATE.cancel_requested = False
+    _reset_delay_counter()
 
 
 def get_session_status() -> SessionStatus:
     """Get the current session status."""
-    return _current_session_status
+    return STATE.session_status
 
 
 def set_session_status(status: SessionStatus):
     """Set the session status."""
-    global _current_session_status
-    _current_session_status = status
+    STATE.session_status = status
 
 
 def is_browser_running() -> bool:
     """Check if browser instance is currently running."""
-    return _browser_context is not None
+    return STATE.context is not None
 
 
-import random
+def _reset_delay_counter():
+    """Restart the countdown to the next long break."""
+    STATE.delay_calls = 0
+    STATE.next_long_break = random.randint(*_LONG_BREAK_EVERY)
+
 
 async def human_delay(action_name: str = "action"):
-    """Add a random human-like delay between actions."""
-    delay = random.uniform(settings.human_delay_min, settings.human_delay_max)
+    """
+    Add a random human-like delay between actions.
+    
+    Delays are log-normal around human_delay_median, clamped to
+    [human_delay_min, human_delay_max], with a long break every 15-25 calls.
+    """
+    delay = random.lognormvariate(math.log(settings.human_delay_median), settings.human_delay_sigma)
+    delay = min(max(delay, settings.human_delay_min), settings.human_delay_max)
+    
+    STATE.delay_calls += 1
+    if STATE.delay_calls >= STATE.next_long_break:
+        _reset_delay_counter()
+        delay += random.uniform(*_LONG_BREAK_SECONDS)
+    
     logger.debug(f"Human delay before {action_name}: {delay:.2f}s")
     await asyncio.sleep(delay)
 
@@ -77,17 +114,103 @@ GERMAN_MONTHS = {
 }
 
 
+_GERMAN_MONTHS_LC = {month.lower(): num for month, num in GERMAN_MONTHS.items()}
+
+# Precompiled patterns for the admin order page
+_GERMAN_DATE_RE = re.compile(
+    r'(\d{1,2})\.\s*(Jan|Jän|Feb|Mär|Mar|Apr|Mai|May|Jun|Jul|Aug|Sep|Okt|Oct|Nov|Dez|Dec)\.?\s*(\d{4})',
+    re.IGNORECASE
+)
+# Invoice download link, absolute or relative:
+# href="https://admin.shopify.com/store/{slug}/orders/{order_id}/tax_invoices/{uuid}/download/vat_invoice_{invoice_number}.pdf"
+_INVOICE_PDF_RE = re.compile(r'href="([^"]+/tax_invoices/[^"]+/download/[^"]+\.pdf)"')
+_INVOICE_UUID_RE = re.compile(r'/tax_invoices/([a-f0-9-]+)/')
+_INVOICE_NUM_RE = re.compile(r'vat_invoice_([A-Z0-9-]+)\.pdf')
+# Single pass over the raw order HTML: any invoice link (download or legacy),
+# the invoice number text and the German timeline date
+_ADMIN_PAGE_RE = re.compile(
+    r'href="(?P<href>[^"]+/tax_invoices/[^"]+)"'
+    r'|(?P<invtxt>INV-[A-Z]{2}-\d+)'
+    r'|(?P<date>(?P<day>\d{1,2})\.\s*(?P<month>(?i:Jan|Jän|Feb|Mär|Mar|Apr|Mai|May|Jun|Jul|Aug|Sep|Okt|Oct|Nov|Dez|Dec))\.?\s*(?P<year>\d{4}))'
+)
+
+# Either selector means the order page has rendered enough to scrape
+_ORDER_READY_SELECTOR = 'a[href*="/tax_invoices/"], [class*="Polaris-Page"]'
+
+# Runs inside the order page and returns only the invoice link, number and
+# date, so the full page HTML doesn't have to cross the browser bridge
+_EXTRACT_INVOICE_JS = r"""() => {
+    const link = document.querySelector('a[href*="/tax_invoices/"][href*="/download/"][href$=".pdf"]')
+        || document.querySelector('a[href*="/tax_invoices/"]');
+    const text = document.body ? document.body.innerText : '';
+    const invoiceNumber = text.match(/INV-[A-Z]{2}-\d+/);
+    const date = text.match(/(\d{1,2})\.\s*(Jän|Jan|Feb|Mär|Mar|Apr|Mai|May|Jun|Jul|Aug|Sep|Okt|Oct|Nov|Dez|Dec)\.?\s*(\d{4})/i);
+    return {
+        href: link ? link.getAttribute('href') : null,
+        invoiceNumber: invoiceNumber ? invoiceNumber[0] : null,
+        date: date ? date.slice(1, 4) : null,
+    };
+}"""
+
+# URL fragments that mean we were redirected to a login page
+_LOGIN_INDICATORS = (
+    "accounts.shopify.com",
+    "/login",
+    "/auth/login",
+    "identity.shopify.com",
+)
+
+# Page text showing the order has a VAT invoice section
+# ('VAT invoice' also matches the plural "VAT invoices" heading)
+_INVOICE_SECTION_TERMS = (
+    'MwSt.-Rechnungen',  # German
+    'VAT invoice',       # English
+    'tax_invoices',      # URL pattern (always present if invoice exists)
+)
+
+
+def _format_german_date(day: str, month: str, year: str) -> str:
+    """Build an ISO date from German day/month-abbreviation/year parts."""
+    month_num = _GERMAN_MONTHS_LC.get(month.lower(), '01')
+    return f"{year}-{month_num}-{day.zfill(2)}"
+
+
 def parse_german_date(date_str: str) -> Optional[str]:
     """Convert German date format to ISO format."""
-    pattern = r'(\d{1,2})\.\s*(Jan|Jän|Feb|Mär|Mar|Apr|Mai|May|Jun|Jul|Aug|Sep|Okt|Oct|Nov|Dez|Dec)\.?\s*(\d{4})'
-    match = re.search(pattern, date_str, re.IGNORECASE)
+    match = _GERMAN_DATE_RE.search(date_str)
     if match:
-        day, month, year = match.groups()
-        month_num = GERMAN_MONTHS.get(month.capitalize(), '01')
-        return f"{year}-{month_num}-{day.zfill(2)}"
+        return _format_german_date(*match.groups())
     return None
 
 
+def _scan_order_html(html: str) -> tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    Find the invoice URL, invoice number and invoice date in raw order HTML.
+    
+    A PDF download link wins over a legacy tax_invoices link even if it
+    appears later; otherwise the first match of each kind is used.
+    """
+    pdf_url = legacy_url = invoice_number = invoice_date = None
+    
+    for match in _ADMIN_PAGE_RE.finditer(html):
+        kind = match.lastgroup
+        if kind == 'href':
+            if pdf_url is None and _INVOICE_PDF_RE.match(match.group(0)):
+                pdf_url = match.group('href')
+            elif legacy_url is None:
+                legacy_url = match.group('href')
+        elif kind == 'invtxt':
+            invoice_number = invoice_number or match.group('invtxt')
+        elif invoice_date is None:
+            invoice_date = _format_german_date(*match.group('day', 'month', 'year'))
+        
+        if pdf_url and invoice_number and invoice_date:
+            break
+    
+    return pdf_url or legacy_url, invoice_number, invoice_date
+
+
+@functools.lru_cache(maxsize=1)
 def _get_timezone():
     """Get timezone, with fallback for Windows systems without tzdata."""
     try:
@@ -100,35 +223,56 @@ def _get_timezone():
         return timezone(timedelta(hours=1))
 
 
-def get_order_date_folder(order_date_str: Optional[str]) -> str:
+@functools.lru_cache(maxsize=1)
+def _timezone_is_utc() -> bool:
+    """Check whether the configured timezone is always UTC+0 (no DST)."""
+    tz = _get_timezone()
+    return tz.utcoffset(datetime(2000, 1, 1)) == tz.utcoffset(datetime(2000, 7, 1)) == timedelta(0)
+
+
+def get_order_date_folder(order_date: Optional[datetime | str]) -> str:
     """
     Determine the folder date for an order.
     
-    Uses the order creation date (in Vienna timezone) to organize files.
+    Uses the order creation date (in the configured timezone) to organize files.
+    Accepts an already parsed datetime (from the request model) or an ISO string.
     """
     tz = _get_timezone()
     
-    if order_date_str:
+    if order_date:
         try:
-            if order_date_str.endswith('Z'):
-                order_date_str = order_date_str[:-1] + '+00:00'
-            dt = datetime.fromisoformat(order_date_str)
-            dt_local = dt.astimezone(tz)
-            return dt_local.strftime('%Y-%m-%d')
+            if isinstance(order_date, str):
+                # Fast path: Shopify's "YYYY-MM-DDTHH:MM:SSZ" already is the UTC date
+                if order_date.endswith('Z') and _timezone_is_utc():
+                    return date.fromisoformat(order_date[:10]).isoformat()
+                if order_date.endswith('Z'):
+                    order_date = order_date[:-1] + '+00:00'
+                order_date = datetime.fromisoformat(order_date)
+            if _timezone_is_utc() and order_date.utcoffset() == timedelta(0):
+                return order_date.date().isoformat()
+            return order_date.astimezone(tz).date().isoformat()
         except Exception as e:
-            logger.warning(f"Could not parse order date '{order_date_str}': {e}")
+            logger.warning(f"Could not parse order date '{order_date}': {e}")
     
-    return datetime.now(tz).strftime('%Y-%m-%d')
+    return datetime.now(tz).date().isoformat()
 
 
-async def _save_screenshot(page, prefix: str) -> str:
-    """Save debug screenshot and return the filepath."""
-    settings.ensure_directories()
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{prefix}_{timestamp}.png"
-    filepath = os.path.join(settings.screenshot_dir, filename)
+_SCREENSHOT_DIR = Path(settings.screenshot_dir)
+
+
+async def _save_screenshot(page, prefix: str, full_page: bool = False, quality: int = 60) -> str:
+    """
+    Save a JPEG debug screenshot and return the filepath.
+    
+    No-op returning "" unless `debug_screenshots` is enabled.
+    """
+    if not settings.debug_screenshots:
+        return ""
+    
+    # Nanosecond timestamps keep names unique when orders run in parallel
+    filepath = str(_SCREENSHOT_DIR / f"{prefix}_{time.time_ns()}.jpg")
     try:
-        await page.screenshot(path=filepath, full_page=True)
+        await page.screenshot(path=filepath, full_page=full_page, type='jpeg', quality=quality)
         logger.info(f"Screenshot saved: {filepath}")
     except Exception as e:
         logger.warning(f"Failed to save screenshot: {e}")
@@ -143,10 +287,8 @@ async def get_browser_context():
     Uses a persistent profile directory to maintain login sessions across restarts.
     Spoofs Firefox version to avoid Shopify browser compatibility warnings.
     """
-    global _browser_instance, _browser_context
-    
-    if _browser_context is not None:
-        return _browser_context
+    if STATE.context is not None:
+        return STATE.context
     
     settings.ensure_directories()
     profile_path = Path(settings.profile_dir).absolute()
@@ -163,7 +305,7 @@ async def get_browser_context():
     # Launch Camoufox with persistent context
     # When persistent_context=True, this returns a BrowserContext directly
     # See: https://github.com/daijro/camoufox/blob/main/pythonlib/camoufox/async_api.py
-    _browser_instance = await AsyncCamoufox(
+    STATE.browser = await AsyncCamoufox(
         headless=settings.headless,
         persistent_context=True,
         user_data_dir=str(profile_path),
@@ -172,34 +314,73 @@ async def get_browser_context():
         i_know_what_im_doing=True,  # Suppress warning about manual navigator properties
     ).__aenter__()
     
-    # With persistent_context=True, _browser_instance IS the context
-    _browser_context = _browser_instance
+    # With persistent_context=True, the browser instance IS the context
+    STATE.context = STATE.browser
     
-    return _browser_context
+    return STATE.context
 
 
 async def close_browser():
     """Close the browser instance."""
-    global _browser_instance, _browser_context
-    
-    if _browser_instance is not None:
+    if STATE.browser is not None:
         try:
-            await _browser_instance.__aexit__(None, None, None)
+            await STATE.browser.__aexit__(None, None, None)
         except Exception as e:
             logger.warning(f"Error closing browser: {e}")
-        _browser_instance = None
-        _browser_context = None
+        STATE.browser = None
+        STATE.context = None
+    
+    STATE.page_pool = None
+    STATE.page_use_count.clear()
+
+
+async def _acquire_page():
+    """Get an idle page from the pool, or open a new one."""
+    if STATE.page_pool is None:
+        STATE.page_pool = asyncio.Queue(maxsize=max(1, settings.batch_concurrency))
+    
+    while not STATE.page_pool.empty():
+        page = STATE.page_pool.get_nowait()
+        if not page.is_closed():
+            STATE.page_use_count[page] = STATE.page_use_count.get(page, 0) + 1
+            return page
+        STATE.page_use_count.pop(page, None)
+    
+    context = await get_browser_context()
+    page = await context.new_page()
+    page.set_default_timeout(settings.timeout_page_load)
+    STATE.page_use_count[page] = 1
+    return page
+
+
+async def _release_page(page, discard: bool = False):
+    """
+    Return a page to the pool.
+    
+    Pages are closed instead once they served `page_recycle_after` orders
+    (bounds Playwright's per-page memory growth), when the pool is full,
+    or when discard=True (e.g. after an unexpected error).
+    """
+    uses = STATE.page_use_count.pop(page, 0)
+    try:
+        if page.is_closed():
+            return
+        if discard or uses >= settings.page_recycle_after or STATE.page_pool is None or STATE.page_pool.full():
+            await page.close()
+            return
+        STATE.page_use_count[page] = uses
+        STATE.page_pool.put_nowait(page)
+    except Exception as e:
+        logger.debug(f"Error releasing page: {e}")
 
 
 async def close_all_pages():
     """Close all open pages but keep the browser context alive for session persistence."""
-    global _browser_context
-    
-    if _browser_context is None:
+    if STATE.context is None:
         return
     
     try:
-        pages = _browser_context.pages
+        pages = STATE.context.pages
         for page in pages:
             try:
                 await page.close()
@@ -217,13 +398,11 @@ async def show_status_page():
     This provides clear visual feedback that the browser is intentionally
     kept open for session persistence, not a bug or oversight.
     """
-    global _browser_context
-    
-    if _browser_context is None:
+    if STATE.context is None:
         return
     
     try:
-        pages = _browser_context.pages
+        pages = STATE.context.pages
         
         # Close all pages except one, reuse the last one for status
         if len(pages) > 1:
@@ -247,7 +426,7 @@ async def show_status_page():
         # If no usable page, create one
         if page is None:
             try:
-                page = await _browser_context.new_page()
+                page = await STATE.context.new_page()
             except Exception as e:
                 logger.warning(f"Could not create new page for status: {e}")
                 return
@@ -271,6 +450,16 @@ async def show_status_page():
         logger.warning(f"Error showing status page: {e}")
 
 
+def _is_login_url(url: str) -> bool:
+    """Check whether a URL is a Shopify login/identity redirect."""
+    return any(indicator in url for indicator in _LOGIN_INDICATORS)
+
+
+def _is_admin_url(url: str) -> bool:
+    """Check whether a URL points into the store admin (not a login or auth page)."""
+    return "admin.shopify.com/store/" in url and "/auth" not in url and not _is_login_url(url)
+
+
 async def check_login_status(page) -> bool:
     """
     Check if we're logged into Shopify admin.
@@ -280,47 +469,74 @@ async def check_login_status(page) -> bool:
     current_url = page.url
     
     # Check for login redirect indicators
-    login_indicators = [
-        "accounts.shopify.com",
-        "/login",
-        "/auth/login",
-        "identity.shopify.com"
-    ]
-    
-    for indicator in login_indicators:
-        if indicator in current_url:
-            logger.info(f"Login required - detected redirect to: {current_url}")
-            return False
+    if _is_login_url(current_url):
+        logger.info(f"Login required - detected redirect to: {current_url}")
+        return False
     
-    # Check for admin UI elements (Polaris components)
-    try:
-        # Wait briefly for Polaris page structure
-        await page.wait_for_selector('[class*="Polaris-Page"], [class*="Polaris-Frame"]', timeout=5000)
+    # A store admin URL without a login/auth redirect already confirms the session
+    if _is_admin_url(current_url):
         return True
-    except Exception:
-        # May still be loading or on a non-admin page
-        pass
     
-    # Additional check: look for specific admin elements
+    # Ambiguous URL (e.g. custom admin domain) - check for admin UI elements (Polaris components)
     try:
-        html = await page.content()
-        if 'Polaris-Page' in html or 'admin.shopify.com/store' in current_url:
-            return True
+        # Wait briefly for Polaris page structure to be attached to the DOM
+        await page.locator('[class*="Polaris-Page"], [class*="Polaris-Frame"]').first.wait_for(
+            state='attached', timeout=5000
+        )
+        return True
     except Exception:
-        pass
-    
-    return False
+        # Not an admin page (still loading, or an auth step)
+        return False
+
+
+async def _wait_for_cancel(poll_interval: float = 0.25):
+    """Return once cancellation has been requested."""
+    while not is_cancelled():
+        await asyncio.sleep(poll_interval)
 
 
-async def ensure_logged_in() -> tuple[bool, Optional[str]]:
+async def _wait_for_login(page, timeout_seconds: float) -> str:
+    """
+    Wait for whichever comes first: the page reaching the admin, an external
+    login-complete signal, or a cancellation request.
+    
+    Returns "signalled", "cancelled", "admin_url" or "timeout". Errors from
+    the page other than Playwright's TimeoutError are re-raised.
+    """
+    url_task = asyncio.create_task(page.wait_for_url(_is_admin_url, timeout=timeout_seconds * 1000))
+    signal_task = asyncio.create_task(STATE.login_event.wait())
+    cancel_task = asyncio.create_task(_wait_for_cancel())
+    waiters = (url_task, signal_task, cancel_task)
+    
+    try:
+        await asyncio.wait(waiters, timeout=timeout_seconds, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in waiters:
+            task.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+    
+    if cancel_task.done() and not cancel_task.cancelled():
+        return "cancelled"
+    if signal_task.done() and not signal_task.cancelled():
+        return "signalled"
+    if url_task.done() and not url_task.cancelled():
+        error = url_task.exception()
+        if error is None:
+            return "admin_url"
+        # Anything but a timeout (tab closed, frame detached) is a real failure
+        if type(error).__name__ != "TimeoutError":
+            raise error
+    return "timeout"
+
+
+async def ensure_logged_in(wait_for_login: bool = True) -> tuple[bool, Optional[str]]:
     """
     Ensure we're logged into Shopify admin.
     
     If not logged in, opens admin page and waits for manual login.
+    With wait_for_login=False, returns immediately instead of waiting.
     Returns (success, error_message).
     """
-    global _login_event
-    
     set_session_status(SessionStatus.CHECKING)
     
     try:
@@ -349,39 +565,39 @@ async def ensure_logged_in() -> tuple[bool, Optional[str]]:
         logger.warning("Not logged in - manual login required")
         set_session_status(SessionStatus.LOGIN_REQUIRED)
         
+        if not wait_for_login:
+            await page.close()
+            return False, "Login required"
+        
         # Create an event for signaling login completion
-        _login_event = asyncio.Event()
+        STATE.login_event = asyncio.Event()
         
         # Keep page open and wait for login (with timeout)
         logger.info(f"Waiting up to {settings.timeout_login_wait/1000}s for manual login...")
         
-        start_time = asyncio.get_event_loop().time()
-        timeout_seconds = settings.timeout_login_wait / 1000
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.timeout_login_wait / 1000
         
         while True:
-            elapsed = asyncio.get_event_loop().time() - start_time
-            if elapsed > timeout_seconds:
+            remaining = deadline - loop.time()
+            outcome = await _wait_for_login(page, remaining) if remaining > 0 else "timeout"
+            
+            if outcome == "timeout":
                 logger.error("Login timeout - user did not log in within time limit")
                 await page.close()
                 return False, "Login timeout - please try again"
             
-            # Check for cancellation
-            if is_cancelled():
+            if outcome == "cancelled":
                 await page.close()
                 return False, "Cancelled by user"
             
-            # Check if external signal received
-            if _login_event and _login_event.is_set():
+            if outcome == "signalled":
                 break
             
-            # Check if now logged in
-            current_url = page.url
-            if "admin.shopify.com/store" in current_url and "/login" not in current_url:
-                # Verify with element check
-                if await check_login_status(page):
-                    break
-            
-            await asyncio.sleep(2)  # Check every 2 seconds
+            # Admin URL reached - verify with element check
+            if await check_login_status(page):
+                break
+            await asyncio.sleep(1)
         
         logger.info("Login successful!")
         set_session_status(SessionStatus.LOGGED_IN)
@@ -396,15 +612,27 @@ async def ensure_logged_in() -> tuple[bool, Optional[str]]:
 
 def signal_login_complete():
     """Signal that login has been completed (called from external trigger)."""
-    global _login_event
-    if _login_event:
-        _login_event.set()
+    if STATE.login_event:
+        STATE.login_event.set()
+
+
+def _login_required_result(order_id: str, order_name: Optional[str]) -> ScrapeResult:
+    """Record the expired session and build the needs_login result."""
+    logger.warning("Session expired - login required")
+    set_session_status(SessionStatus.LOGIN_REQUIRED)
+    return ScrapeResult(
+        success=False,
+        shopify_order_id=order_id,
+        order_name=order_name,
+        error="Session expired - login required",
+        needs_login=True
+    )
 
 
 async def scrape_admin_invoice(
     order_id: str,
     order_name: Optional[str] = None,
-    order_date: Optional[str] = None
+    order_date: Optional[datetime] = None
 ) -> ScrapeResult:
     """
     Scrape VAT invoice from Shopify admin order page.
@@ -412,7 +640,7 @@ async def scrape_admin_invoice(
     Args:
         order_id: Shopify order ID (legacyResourceId)
         order_name: Order name for logging (e.g., '#8512')
-        order_date: Order date for folder organization (ISO format)
+        order_date: Order date for folder organization
     
     Returns:
         ScrapeResult with invoice data or error information
@@ -421,13 +649,10 @@ async def scrape_admin_invoice(
         logger.info("Scraping cancelled before start")
         return ScrapeResult(success=False, error="Cancelled by user")
     
-    settings.ensure_directories()
     order_desc = order_name or f"Order {order_id}"
     
     try:
-        context = await get_browser_context()
-        page = await context.new_page()
-        page.set_default_timeout(settings.timeout_page_load)
+        page = await _acquire_page()
         
         # Human-like delay before navigation
         await human_delay("navigation")
@@ -438,34 +663,24 @@ async def scrape_admin_invoice(
         
         response = await page.goto(order_url, wait_until='domcontentloaded')
         
-        # Wait for page to load
-        try:
-            await page.wait_for_load_state('networkidle', timeout=15000)
-        except Exception:
-            pass
-        
-        # Human-like delay after page load
-        await human_delay("page_loaded")
-        
-        # Check if logged in
+        # A redirect to the login page is visible in the URL right away -
+        # check it before waiting for order content that will never render
         if not await check_login_status(page):
-            logger.warning("Session expired - login required")
-            await page.close()
-            set_session_status(SessionStatus.LOGIN_REQUIRED)
-            return ScrapeResult(
-                success=False,
-                shopify_order_id=order_id,
-                order_name=order_name,
-                error="Session expired - login required",
-                needs_login=True
-            )
+            await _release_page(page)
+            return _login_required_result(order_id, order_name)
         
-        # Wait for order page content to load
+        # Wait for the invoice link or the page frame, whichever renders first -
+        # the admin keeps polling in the background, so networkidle is too slow
         try:
-            await page.wait_for_selector('[class*="Polaris-Page"]', timeout=settings.timeout_selector)
+            await page.wait_for_selector(_ORDER_READY_SELECTOR, timeout=settings.timeout_selector)
         except Exception:
+            # A client-side redirect to login can land after domcontentloaded
+            if _is_login_url(page.url):
+                await _release_page(page)
+                return _login_required_result(order_id, order_name)
+            
             screenshot_path = await _save_screenshot(page, f"order_load_failed_{order_id}")
-            await page.close()
+            await _release_page(page)
             return ScrapeResult(
                 success=False,
                 shopify_order_id=order_id,
@@ -474,46 +689,33 @@ async def scrape_admin_invoice(
                 screenshot_path=screenshot_path
             )
         
-        # Look for invoice link in the page
-        html = await page.content()
-        
-        # Extract invoice URL from the page
-        # Pattern from admin UI: href="https://admin.shopify.com/store/{slug}/orders/{order_id}/tax_invoices/{uuid}/download/vat_invoice_{invoice_number}.pdf"
-        invoice_patterns = [
-            # Full admin URL pattern
-            r'href="(https://admin\.shopify\.com/store/[^"]+/orders/\d+/tax_invoices/[^"]+/download/[^"]+\.pdf)"',
-            # Relative admin URL pattern
-            r'href="(/store/[^"]+/orders/\d+/tax_invoices/[^"]+/download/[^"]+\.pdf)"',
-            # Any tax_invoices download link
-            r'href="([^"]+/tax_invoices/[^"]+/download/[^"]+\.pdf)"',
-            # Legacy pattern
-            r'href="([^"]+/tax_invoices/[^"]+)"',
-        ]
-        
-        invoice_url = None
-        for pattern in invoice_patterns:
-            match = re.search(pattern, html)
-            if match:
-                invoice_url = match.group(1)
-                # Make relative URLs absolute
-                if invoice_url.startswith('/'):
-                    invoice_url = f"{settings.admin_base_url}{invoice_url}"
-                logger.info(f"Found invoice URL: {invoice_url[:80]}...")
-                break
+        # Human-like delay after page load
+        await human_delay("page_loaded")
         
+        # Extract invoice link, number and date inside the browser
+        data = await page.evaluate(_EXTRACT_INVOICE_JS)
+        invoice_url = data.get('href')
+        
+        # Only pull the full HTML if the DOM query found no invoice link
+        html = None
+        html_invoice_number = html_invoice_date = None
         if not invoice_url:
+            html = await page.content()
+            invoice_url, html_invoice_number, html_invoice_date = _scan_order_html(html)
+        
+        if invoice_url:
+            # Make relative URLs absolute
+            if invoice_url.startswith('/'):
+                invoice_url = f"{settings.admin_base_url}{invoice_url}"
+            logger.info(f"Found invoice URL: {invoice_url[:80]}...")
+        else:
             # Check if order page loaded but no invoice section exists
             # Support both German ("MwSt.-Rechnungen") and English ("VAT invoices") UI
-            has_invoice_section = any(term in html for term in [
-                'MwSt.-Rechnungen',  # German
-                'VAT invoices',       # English
-                'VAT invoice',        # English singular
-                'tax_invoices',       # URL pattern (always present if invoice exists)
-            ])
+            has_invoice_section = any(term in html for term in _INVOICE_SECTION_TERMS)
             
             if not has_invoice_section:
                 screenshot_path = await _save_screenshot(page, f"no_invoice_section_{order_id}")
-                await page.close()
+                await _release_page(page)
                 return ScrapeResult(
                     success=False,
                     shopify_order_id=order_id,
@@ -523,7 +725,7 @@ async def scrape_admin_invoice(
                 )
             
             screenshot_path = await _save_screenshot(page, f"invoice_link_not_found_{order_id}")
-            await page.close()
+            await _release_page(page)
             return ScrapeResult(
                 success=False,
                 shopify_order_id=order_id,
@@ -533,17 +735,15 @@ async def scrape_admin_invoice(
             )
         
         # Extract metadata from URL
-        uuid_match = re.search(r'/tax_invoices/([a-f0-9-]+)/', invoice_url)
-        inv_num_match = re.search(r'vat_invoice_([A-Z0-9-]+)\.pdf', invoice_url)
+        uuid_match = _INVOICE_UUID_RE.search(invoice_url)
+        inv_num_match = _INVOICE_NUM_RE.search(invoice_url)
         
         invoice_uuid = uuid_match.group(1) if uuid_match else None
         invoice_number = inv_num_match.group(1) if inv_num_match else None
         
         # If invoice number not in URL, try to extract from page
         if not invoice_number:
-            inv_text_match = re.search(r'(INV-[A-Z]{2}-\d+)', html)
-            if inv_text_match:
-                invoice_number = inv_text_match.group(1)
+            invoice_number = data.get('invoiceNumber') or html_invoice_number
         
         if not invoice_number:
             invoice_number = f"unknown_{order_id}"
@@ -551,18 +751,10 @@ async def scrape_admin_invoice(
         logger.info(f"Extracted: invoice_number={invoice_number}, uuid={invoice_uuid}")
         
         # Extract invoice date from page (German format in timeline)
-        invoice_date = None
-        # Look for date near invoice mention
-        date_patterns = [
-            r'(\d{1,2})\.\s*(Jän|Jan|Feb|Mär|Mar|Apr|Mai|May|Jun|Jul|Aug|Sep|Okt|Oct|Nov|Dez|Dec)\.?\s*(\d{4})',
-        ]
-        for pattern in date_patterns:
-            date_match = re.search(pattern, html, re.IGNORECASE)
-            if date_match:
-                day, month, year = date_match.groups()
-                month_num = GERMAN_MONTHS.get(month.capitalize(), '01')
-                invoice_date = f"{year}-{month_num}-{day.zfill(2)}"
-                break
+        if data.get('date'):
+            invoice_date = _format_german_date(*data['date'])
+        else:
+            invoice_date = html_invoice_date
         
         # Determine folder based on order date
         folder_date = get_order_date_folder(order_date)
@@ -577,72 +769,41 @@ async def scrape_admin_invoice(
         # Human-like delay before downloading
         await human_delay("download")
         
-        # Use response interception - don't rely on page load events for PDFs
-        # PDFs are binary data, not pages, so 'load' events are unreliable
-        pdf_content = None
-        pdf_status = None
-        
-        async def handle_response(response):
-            nonlocal pdf_content, pdf_status
-            if invoice_uuid in response.url and response.status == 200:
-                content_type = response.headers.get('content-type', '')
-                if 'pdf' in content_type or response.url.endswith('.pdf'):
-                    try:
-                        pdf_content = await response.body()
-                        pdf_status = response.status
-                    except Exception as e:
-                        logger.warning(f"Failed to read response body: {e}")
-        
-        # Listen for the PDF response
-        page.on('response', handle_response)
-        
+        # Fetch the PDF through the browser context's HTTP client. It shares the
+        # session cookies and reuses the connection to admin, so there's no
+        # page navigation and no waiting for a PDF viewer to settle.
         try:
-            # Navigate with 'commit' - fires when response headers received
-            # We don't wait for 'load' since PDFs don't have DOM
-            await page.goto(invoice_url, wait_until='commit', timeout=settings.timeout_download)
-            
-            # Give a moment for response body to be captured if not already
-            if pdf_content is None:
-                await page.wait_for_timeout(2000)
-            
+            response = await page.context.request.get(invoice_url, timeout=settings.timeout_download)
         except Exception as e:
             error_msg = str(e)
-            # Timeout on 'commit' usually means network issue, not PDF handling
-            if 'Timeout' in error_msg:
-                logger.warning(f"PDF navigation timeout for {invoice_number}: {error_msg}")
-                screenshot_path = await _save_screenshot(page, f"pdf_timeout_{order_id}")
-                page.remove_listener('response', handle_response)
-                await page.close()
-                return ScrapeResult(
-                    success=False,
-                    shopify_order_id=order_id,
-                    order_name=order_name,
-                    error=f"PDF download timeout: {error_msg}",
-                    screenshot_path=screenshot_path
-                )
-            else:
-                page.remove_listener('response', handle_response)
+            # Timeouts usually mean a network issue - report instead of retrying blindly
+            if 'Timeout' not in error_msg:
                 raise
+            logger.warning(f"PDF download timeout for {invoice_number}: {error_msg}")
+            screenshot_path = await _save_screenshot(page, f"pdf_timeout_{order_id}")
+            await _release_page(page)
+            return ScrapeResult(
+                success=False,
+                shopify_order_id=order_id,
+                order_name=order_name,
+                error=f"PDF download timeout: {error_msg}",
+                screenshot_path=screenshot_path
+            )
         
-        page.remove_listener('response', handle_response)
-        
-        # If interception didn't capture it, try reading from current response
-        if pdf_content is None:
-            try:
-                # Fallback: try to get response directly from page
-                response = await page.context.request.get(invoice_url, timeout=settings.timeout_download)
-                if response.status == 200:
-                    pdf_content = await response.body()
-                    pdf_status = response.status
-            except Exception as e:
-                logger.warning(f"Fallback PDF fetch failed: {e}")
+        pdf_status = response.status
+        try:
+            pdf_content = await response.body() if pdf_status == 200 else None
+        finally:
+            # Free the browser-side copy of the body now - otherwise it stays
+            # in memory until the browser context is closed
+            await response.dispose()
         
         if pdf_content and pdf_status == 200:
             # Verify it's a PDF
             if not pdf_content.startswith(b'%PDF'):
                 # Might have hit a redirect or error page
                 screenshot_path = await _save_screenshot(page, f"pdf_invalid_{order_id}")
-                await page.close()
+                await _release_page(page)
                 return ScrapeResult(
                     success=False,
                     shopify_order_id=order_id,
@@ -651,14 +812,14 @@ async def scrape_admin_invoice(
                     screenshot_path=screenshot_path
                 )
             
-            with open(filepath, 'wb') as f:
-                f.write(pdf_content)
+            # Write off the event loop so concurrent scrapes aren't blocked on disk I/O
+            await asyncio.to_thread(Path(filepath).write_bytes, pdf_content)
             
             logger.info(f"PDF saved successfully: {filepath}")
         else:
-            status = pdf_status if pdf_status else 'No response captured'
+            status = pdf_status if pdf_status != 200 else 'Empty response body'
             screenshot_path = await _save_screenshot(page, f"pdf_download_failed_{order_id}")
-            await page.close()
+            await _release_page(page)
             return ScrapeResult(
                 success=False,
                 shopify_order_id=order_id,
@@ -667,7 +828,7 @@ async def scrape_admin_invoice(
                 screenshot_path=screenshot_path
             )
         
-        await page.close()
+        await _release_page(page)
         
         return ScrapeResult(
             success=True,
@@ -683,11 +844,8 @@ async def scrape_admin_invoice(
     except Exception as e:
         logger.error(f"Error scraping invoice for {order_desc}: {e}")
         # Ensure page is closed even on error
-        try:
-            if 'page' in locals() and page:
-                await page.close()
-        except Exception:
-            pass
+        if 'page' in locals() and page:
+            await _release_page(page, discard=True)
         return ScrapeResult(
             success=False,
             shopify_order_id=order_id,
@@ -699,14 +857,27 @@ async def scrape_admin_invoice(
 async def scrape_invoice_with_retry(
     order_id: str,
     order_name: Optional[str] = None,
-    order_date: Optional[str] = None
+    order_date: Optional[datetime] = None
 ) -> ScrapeResult:
     """
     Scrape invoice with retry logic.
+    
+    Successful results are remembered per (order_id, order_date), so an order
+    that is requested again (e.g. a batch resumed after a crash) is served
+    from memory as long as its PDF is still on disk.
     """
     if is_cancelled():
         return ScrapeResult(success=False, error="Cancelled by user")
     
+    cache_key = (order_id, order_date)
+    cached = STATE.result_cache.get(cache_key)
+    if cached is not None:
+        if os.path.exists(cached.filepath):
+            STATE.result_cache.move_to_end(cache_key)
+            logger.info(f"Invoice for {order_name or order_id} already downloaded: {cached.filepath}")
+            return cached
+        del STATE.result_cache[cache_key]
+    
     last_error = None
     
     for attempt in range(settings.retry_attempts):
@@ -721,6 +892,11 @@ async def scrape_invoice_with_retry(
             if result.needs_login:
                 return result
             
+            if result.success and result.filepath:
+                STATE.result_cache[cache_key] = result
+                if len(STATE.result_cache) > _RESULT_CACHE_SIZE:
+                    STATE.result_cache.popitem(last=False)
+            
             # If successful or definitive failure, return
             if result.success or "not be generated yet" in (result.error or ""):
                 return result
@@ -740,3 +916,54 @@ async def scrape_invoice_with_retry(
         order_name=order_name,
         error=last_error or "Unknown error after all retries"
     )
+
+
+async def scrape_many(
+    orders: list[AdminScrapeRequest],
+    concurrency: Optional[int] = None
+) -> list[Optional[ScrapeResult]]:
+    """
+    Scrape several orders concurrently, at most `concurrency` at a time.
+    
+    Each order gets its own tab from the page pool, and the per-order
+    human_delay staggers requests so parallel orders don't hit Shopify at
+    the same instant. Keep concurrency low - polite crawling guidance is
+    roughly one request per 10-15s per domain, and the admin rate-limits.
+    
+    Results are returned in request order. Once an order reports
+    needs_login, orders that haven't started yet are skipped and their
+    slot in the result list is None.
+    """
+    sem = asyncio.Semaphore(max(1, concurrency or settings.batch_concurrency))
+    login_lost = asyncio.Event()
+    total = len(orders)
+    
+    async def _scrape_bounded(index: int, order: AdminScrapeRequest) -> Optional[ScrapeResult]:
+        async with sem:
+            if login_lost.is_set():
+                return None
+            
+            logger.info(f"Batch progress: Scraping {order.order_name or f'order {index}/{total}'}...")
+            result = await scrape_invoice_with_retry(
+                order.order_id,
+                order.order_name,
+                order.order_date
+            )
+            if result.needs_login:
+                login_lost.set()
+            return result
+    
+    results = await asyncio.gather(
+        *(_scrape_bounded(i, order) for i, order in enumerate(orders, 1)),
+        return_exceptions=True
+    )
+    
+    return [
+        ScrapeResult(
+            success=False,
+            shopify_order_id=order.order_id,
+            order_name=order.order_name,
+            error=str(result)
+        ) if isinstance(result, Exception) else result
+        for order, result in zip(orders, results)
+    ]
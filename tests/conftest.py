@@ -10,38 +10,90 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 # Set required environment variables for tests BEFORE importing config
 os.environ.setdefault('STORE_SLUG', 'test-store')
 os.environ.setdefault('TIMEZONE', 'UTC')
+os.environ.setdefault('PREWARM_BROWSER', 'false')
 
 # Mock camoufox before any imports that need it
 sys.modules['camoufox'] = MagicMock()
 sys.modules['camoufox.async_api'] = MagicMock()
 
 
+@pytest.fixture(scope="session", autouse=True)
+def _warm_imports():
+    """Import the app once up front so the first test doesn't pay for it."""
+    import src.config  # noqa: F401
+    import src.models  # noqa: F401
+    import src.scraper  # noqa: F401
+    import src.main  # noqa: F401
+
+
 @pytest.fixture(autouse=True)
 def reset_scraper_state():
     """Reset scraper state before each test."""
     # Import after mocking
-    from src.scraper import reset_cancel, set_session_status
+    from src.scraper import STATE, reset_cancel, set_session_status, _get_timezone, _timezone_is_utc
     from src.models import SessionStatus
     
     reset_cancel()
+    STATE.result_cache.clear()
     set_session_status(SessionStatus.UNKNOWN)
+    _get_timezone.cache_clear()
+    _timezone_is_utc.cache_clear()
     yield
 
 
+@pytest.fixture
+def cancel_state(monkeypatch):
+    """Give the test its own scraper state, discarded afterwards."""
+    from src import scraper
+    
+    state = scraper.ScraperState()
+    monkeypatch.setattr(scraper, "STATE", state)
+    return state
+
+
+@pytest.fixture(scope="session")
+def settings_obj():
+    """The already-loaded application settings."""
+    from src.config import settings
+    return settings
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Create one test client for the API, running the app lifespan once."""
+    from fastapi.testclient import TestClient
+    from src.main import app
+    
+    with TestClient(app) as c:
+        yield c
+
+
 @pytest.fixture
 def mock_browser_context():
-    """Mock browser context for testing."""
+    """Mock browser context and admin order page for testing."""
     from unittest.mock import AsyncMock
     
+    response = MagicMock()
+    response.status = 200
+    response.body = AsyncMock(return_value=b"%PDF-1.4 test")
+    response.dispose = AsyncMock()
+    
     mock_page = MagicMock()
-    mock_page.url = "https://admin.shopify.com/store/test-store/orders"
+    mock_page.url = "https://admin.shopify.com/store/test-store/orders/123"
     mock_page.goto = AsyncMock()
     mock_page.wait_for_load_state = AsyncMock()
-    mock_page.locator = MagicMock()
+    mock_page.wait_for_selector = AsyncMock()
+    mock_page.wait_for_url = AsyncMock()
+    mock_page.locator.return_value.first.wait_for = AsyncMock()
+    mock_page.content = AsyncMock(return_value="")
+    mock_page.evaluate = AsyncMock(return_value={"href": None, "invoiceNumber": None, "date": None})
     mock_page.screenshot = AsyncMock()
+    mock_page.close = AsyncMock()
+    mock_page.is_closed.return_value = False
+    mock_page.context.request.get = AsyncMock(return_value=response)
     
     mock_context = MagicMock()
-    mock_context.new_page = MagicMock(return_value=mock_page)
+    mock_context.new_page = AsyncMock(return_value=mock_page)
     mock_context.close = MagicMock()
     
     return mock_context, mock_page
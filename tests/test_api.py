@@ -1,14 +1,23 @@
 """Tests for FastAPI endpoints."""
 import pytest
-from fastapi.testclient import TestClient
+from types import SimpleNamespace
 from unittest.mock import patch, AsyncMock, MagicMock
 
 
 @pytest.fixture
-def client():
-    """Create test client for API."""
-    from src.main import app
-    return TestClient(app)
+def mock_main(monkeypatch):
+    """Replace the scraper calls the endpoints make with mocks."""
+    from src import main
+    
+    mocks = SimpleNamespace(
+        ensure_logged_in=AsyncMock(return_value=(True, None)),
+        signal_login_complete=MagicMock(),
+        cancel_scraping=MagicMock(),
+    )
+    monkeypatch.setattr(main, "ensure_logged_in", mocks.ensure_logged_in)
+    monkeypatch.setattr(main, "signal_login_complete", mocks.signal_login_complete)
+    monkeypatch.setattr(main, "cancel_scraping", mocks.cancel_scraping)
+    return mocks
 
 
 class TestHealthEndpoint:
@@ -30,6 +39,15 @@ class TestHealthEndpoint:
         
         assert "version" in data
 
+    def test_health_download_dir_is_absolute(self, client):
+        """Test that health reports the resolved absolute download directory."""
+        import os
+        
+        response = client.get("/health")
+        data = response.json()
+        
+        assert os.path.isabs(data["download_dir"])
+
 
 class TestSessionEndpoints:
     """Test session management endpoints."""
@@ -44,25 +62,22 @@ class TestSessionEndpoints:
         # Response includes store_slug, message
         assert "store_slug" in data or "message" in data
 
-    def test_session_check_endpoint(self, client):
+    def test_session_check_endpoint(self, client, mock_main):
         """Test /session/check endpoint."""
-        with patch("src.main.ensure_logged_in", new_callable=AsyncMock) as mock:
-            mock.return_value = (True, None)
-            
-            response = client.post("/session/check")
-            
-            assert response.status_code == 200
-            data = response.json()
-            # Response includes status field
-            assert "status" in data
+        response = client.post("/session/check")
+        
+        assert response.status_code == 200
+        data = response.json()
+        # Response includes status field
+        assert "status" in data
+        mock_main.ensure_logged_in.assert_awaited_once()
 
-    def test_session_login_complete_endpoint(self, client):
+    def test_session_login_complete_endpoint(self, client, mock_main):
         """Test /session/login-complete endpoint."""
-        with patch("src.main.signal_login_complete") as mock_signal:
-            response = client.post("/session/login-complete")
-            
-            assert response.status_code == 200
-            mock_signal.assert_called_once()
+        response = client.post("/session/login-complete")
+        
+        assert response.status_code == 200
+        mock_main.signal_login_complete.assert_called_once()
 
 
 class TestScrapeEndpoint:
@@ -105,27 +120,94 @@ class TestScrapeEndpoint:
             assert "error" in data
 
 
+class TestBatchEndpoint:
+    """Test /scrape-batch endpoint."""
+
+    def test_batch_preserves_order(self, client):
+        """Test that concurrent batch results keep the request order."""
+        from src.models import ScrapeResult
+        
+        async def fake_scrape(order_id, order_name=None, order_date=None):
+            return ScrapeResult(success=True, shopify_order_id=order_id, order_name=order_name)
+        
+        with patch("src.main.ensure_logged_in", new_callable=AsyncMock) as mock_login, \
+             patch("src.scraper.scrape_invoice_with_retry", side_effect=fake_scrape), \
+             patch("src.main.show_status_page", new_callable=AsyncMock):
+            mock_login.return_value = (True, None)
+            
+            response = client.post("/scrape-batch", json={
+                "orders": [{"order_id": str(i)} for i in range(5)]
+            })
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["successful"] == 5
+        assert [r["shopify_order_id"] for r in data["results"]] == ["0", "1", "2", "3", "4"]
+
+    def test_batch_stops_on_needs_login(self, client):
+        """Test that the batch returns needs_login when the session expires."""
+        from src.models import ScrapeResult
+        
+        async def fake_scrape(order_id, order_name=None, order_date=None):
+            return ScrapeResult(success=False, shopify_order_id=order_id, needs_login=True)
+        
+        with patch("src.main.ensure_logged_in", new_callable=AsyncMock) as mock_login, \
+             patch("src.scraper.scrape_invoice_with_retry", side_effect=fake_scrape):
+            mock_login.return_value = (True, None)
+            
+            response = client.post("/scrape-batch", json={
+                "orders": [{"order_id": str(i)} for i in range(5)]
+            })
+        
+        data = response.json()
+        assert data["needs_login"] is True
+        assert data["successful"] == 0
+        assert data["successful"] + data["failed"] == data["total"]
+
+
 class TestCancelEndpoint:
     """Test /cancel endpoint."""
 
-    def test_cancel_endpoint(self, client):
+    def test_cancel_endpoint(self, client, mock_main):
         """Test cancel scraping endpoint."""
-        with patch("src.main.cancel_scraping") as mock_cancel:
-            response = client.post("/cancel")
-            
-            assert response.status_code == 200
-            mock_cancel.assert_called_once()
+        response = client.post("/cancel")
+        
+        assert response.status_code == 200
+        mock_main.cancel_scraping.assert_called_once()
 
 
 class TestCORSHeaders:
     """Test CORS configuration."""
 
-    def test_cors_headers_present(self, client):
-        """Test that CORS headers are set."""
-        response = client.options("/health", headers={
-            "Origin": "http://localhost:8080",
-            "Access-Control-Request-Method": "GET",
-        })
+    def test_cors_middleware_installed(self):
+        """Test that the CORS middleware is registered on the app."""
+        from src.main import StaticCORSMiddleware, app
+        
+        assert any(m.cls is StaticCORSMiddleware for m in app.user_middleware)
+
+    def test_cors_header_on_simple_request(self, client):
+        """Test that regular responses carry the allow-origin header."""
+        response = client.get("/health", headers={"Origin": "http://localhost:8080"})
+        
+        assert response.headers["access-control-allow-origin"] == "*"
+
+
+class TestLogging:
+    """Test the queued logging setup."""
+
+    def test_records_after_stop_are_not_lost(self):
+        """Test that stopping the listener hands logging back to the real handlers."""
+        import logging
+        from src import main
+        
+        root = logging.getLogger()
+        try:
+            main.stop_logging()
+            
+            assert main._queue_handler not in root.handlers
+            assert all(h in root.handlers for h in main._log_listener.handlers)
+        finally:
+            main.start_logging()
         
-        # FastAPI CORS middleware should respond
-        assert response.status_code in (200, 204, 405)
+        assert main._queue_handler in root.handlers
+        assert not any(h in root.handlers for h in main._log_listener.handlers)
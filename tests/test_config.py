@@ -2,83 +2,116 @@
 import os
 import pytest
 from unittest.mock import patch
+from pydantic import ValidationError
+
+from src.config import Settings, _env_file_cache, get_settings
 
 
 class TestSettings:
     """Test Settings configuration class."""
 
-    def test_store_slug_from_env(self):
+    def test_store_slug_from_env(self, settings_obj):
         """Test that store_slug is loaded from environment."""
-        from src.config import settings
-        
         # Set by conftest.py
-        assert settings.store_slug == "test-store"
+        assert settings_obj.store_slug == "test-store"
 
-    def test_timeout_defaults(self):
+    def test_timeout_defaults(self, settings_obj):
         """Test that timeout values are reasonable."""
-        from src.config import settings
-        
-        assert settings.timeout_page_load >= 30000
-        assert settings.timeout_selector >= 10000
-        assert settings.timeout_login_wait >= 60000
+        assert settings_obj.timeout_page_load >= 30000
+        assert settings_obj.timeout_selector >= 10000
+        assert settings_obj.timeout_login_wait >= 60000
 
-    def test_browser_profile_configured(self):
+    def test_browser_profile_configured(self, settings_obj):
         """Test that browser profile directory is configured."""
-        from src.config import settings
-        
-        assert settings.profile_dir is not None
-        assert len(settings.profile_dir) > 0
+        assert settings_obj.profile_dir is not None
+        assert len(settings_obj.profile_dir) > 0
 
-    def test_admin_store_url_property(self):
+    def test_admin_store_url_property(self, settings_obj):
         """Test admin_store_url property generation."""
-        from src.config import settings
-        
-        url = settings.admin_store_url
+        url = settings_obj.admin_store_url
         assert "admin.shopify.com/store/" in url
-        assert settings.store_slug in url
+        assert settings_obj.store_slug in url
 
-    def test_get_admin_order_url(self):
+    def test_get_admin_order_url(self, settings_obj):
         """Test order URL generation."""
-        from src.config import settings
-        
         order_id = "12345678901234"
-        url = settings.get_admin_order_url(order_id)
+        url = settings_obj.get_admin_order_url(order_id)
         
         assert order_id in url
-        assert settings.store_slug in url
+        assert settings_obj.store_slug in url
         assert url.endswith(f"/orders/{order_id}")
 
+    def test_get_settings_is_cached(self, settings_obj):
+        """Test that get_settings returns the module-level instance."""
+        assert get_settings() is settings_obj
+
+    def test_settings_are_frozen(self, settings_obj):
+        """Test that settings cannot be modified after loading."""
+        with pytest.raises(ValidationError):
+            settings_obj.download_dir = "./elsewhere"
+
+
+    @pytest.mark.parametrize("overrides", [
+        {"human_delay_median": 0},
+        {"human_delay_median": -1},
+        {"human_delay_sigma": -0.1},
+        {"human_delay_median": 5.0},  # Above human_delay_max
+        {"human_delay_min": 3.0},  # Above human_delay_max
+    ])
+    def test_invalid_human_delay_rejected(self, overrides):
+        """Test that human delay settings that would break sampling fail at startup."""
+        with pytest.raises(ValidationError):
+            Settings(**overrides)
+
+    def test_env_file_reparsed_only_when_changed(self, tmp_path):
+        """Test that .env parsing is cached until the file changes."""
+        env_file = tmp_path / ".env"
+        env_file.write_text("PORT=9001\n")
+        
+        assert Settings(_env_file=env_file).port == 9001
+        assert str(env_file.resolve()) in _env_file_cache
+        
+        env_file.write_text("PORT=9002\n")
+        os.utime(env_file, ns=(0, env_file.stat().st_mtime_ns + 1_000_000))
+        
+        assert Settings(_env_file=env_file).port == 9002
+
+    def test_env_file_honours_env_prefix(self, tmp_path):
+        """Test that the cached .env source keeps the configured env_prefix."""
+        env_file = tmp_path / ".env"
+        env_file.write_text("X_PORT=9003\nX_STORE_SLUG=prefixed\n")
+        
+        assert Settings(_env_file=env_file, _env_prefix="X_").port == 9003
+
 
 class TestOutputDirectory:
     """Test output directory configuration."""
 
-    def test_download_dir_configured(self):
+    def test_download_dir_configured(self, settings_obj):
         """Test that download directory is configured."""
-        from src.config import settings
-        
-        assert settings.download_dir is not None
-        assert len(settings.download_dir) > 0
+        assert settings_obj.download_dir is not None
+        assert len(settings_obj.download_dir) > 0
 
-    def test_screenshot_dir_configured(self):
+    def test_screenshot_dir_configured(self, settings_obj):
         """Test screenshot directory is configured."""
-        from src.config import settings
-        
-        assert settings.screenshot_dir is not None
+        assert settings_obj.screenshot_dir is not None
 
-    def test_ensure_directories_creates_folders(self):
+    def test_ensure_directories_creates_folders(self, tmp_path):
         """Test that ensure_directories creates required folders."""
-        from src.config import settings
-        import tempfile
-        import shutil
+        # Settings are frozen, so monkeypatching the shared instance isn't
+        # possible - use a separate instance pointing at a temp directory
+        local_settings = Settings(download_dir=str(tmp_path / "downloads"))
+        
+        local_settings.ensure_directories()
+        
+        assert os.path.isdir(local_settings.download_dir)
+
+    def test_get_date_folder_creates_folder_once(self, tmp_path):
+        """Test that get_date_folder creates the folder and remembers it."""
+        local_settings = Settings(download_dir=str(tmp_path / "downloads"))
+        
+        folder = local_settings.get_date_folder("2026-01-22")
         
-        # Use temp directory for test
-        with tempfile.TemporaryDirectory() as tmpdir:
-            original_download = settings.download_dir
-            settings.download_dir = f"{tmpdir}/downloads"
-            
-            settings.ensure_directories()
-            
-            assert os.path.isdir(settings.download_dir)
-            
-            # Restore
-            settings.download_dir = original_download
+        assert folder.is_dir()
+        assert "2026-01-22" in local_settings._created_date_folders
+        assert local_settings.get_date_folder("2026-01-22") == folder
@@ -1,57 +1,62 @@
 """Tests for Pydantic models."""
 import pytest
-from datetime import datetime
+from datetime import datetime, timezone
+from pydantic import ValidationError
+
+from src.models import (
+    ScrapeResult,
+    AdminScrapeRequest,
+    SessionStatus,
+    SessionStatusResponse,
+    BatchScrapeRequest,
+    BatchScrapeResult,
+)
+
+
+# Fully populated successful result
+_BASE = {
+    "success": True,
+    "order_name": "#1234",
+    "shopify_order_id": "12345678901234",
+    "invoice_number": "INV-DE-001",
+    "invoice_uuid": "abc-123-def",
+    "invoice_url": "https://example.com/invoice.pdf",
+    "invoice_date": "2026-01-22",
+    "filepath": "/path/to/invoice.pdf",
+}
 
 
 class TestScrapeResult:
     """Test ScrapeResult model."""
 
-    def test_success_result(self):
-        """Test creating a successful scrape result."""
-        from src.models import ScrapeResult
-        
-        result = ScrapeResult(
-            success=True,
-            order_name="#1234",
-            shopify_order_id="12345678901234",
-            invoice_number="INV-DE-001",
-            invoice_uuid="abc-123-def",
-            invoice_url="https://example.com/invoice.pdf",
-            invoice_date="2026-01-22",
-            filepath="/path/to/invoice.pdf",
-        )
-        
-        assert result.success is True
-        assert result.order_name == "#1234"
-        assert result.invoice_number == "INV-DE-001"
-        assert result.error is None
-        assert result.needs_login is False
-
-    def test_failure_result(self):
-        """Test creating a failed scrape result."""
-        from src.models import ScrapeResult
-        
-        result = ScrapeResult(
-            success=False,
-            error="Invoice not found",
-        )
-        
-        assert result.success is False
-        assert result.error == "Invoice not found"
-        assert result.order_name is None
-
-    def test_needs_login_result(self):
-        """Test creating a needs_login result."""
-        from src.models import ScrapeResult
-        
-        result = ScrapeResult(
-            success=False,
-            needs_login=True,
-            error="Session expired",
-        )
-        
-        assert result.success is False
-        assert result.needs_login is True
+    @pytest.mark.parametrize("kwargs,expected", [
+        (
+            _BASE,
+            {"success": True, "order_name": "#1234", "invoice_number": "INV-DE-001",
+             "error": None, "needs_login": False},
+        ),
+        (
+            {"success": False, "error": "Invoice not found"},
+            {"success": False, "error": "Invoice not found", "order_name": None},
+        ),
+        (
+            {"success": False, "needs_login": True, "error": "Session expired"},
+            {"success": False, "needs_login": True},
+        ),
+    ], ids=["success", "failure", "needs_login"])
+    def test_result_fields(self, kwargs, expected):
+        """Test creating successful, failed and needs_login results."""
+        result = ScrapeResult(**kwargs)
+        
+        for field, value in expected.items():
+            assert getattr(result, field) == value, field
+
+    def test_repeated_strings_are_interned(self):
+        """Test that repeated values share one string object."""
+        first = ScrapeResult(success=True, invoice_date="".join(["2026-", "01-22"]))
+        second = ScrapeResult(success=True, invoice_date="".join(["2026-01", "-22"]))
+        
+        assert first.invoice_date is second.invoice_date
 
 
 class TestAdminScrapeRequest:
@@ -59,8 +64,6 @@ class TestAdminScrapeRequest:
 
     def test_valid_request(self):
         """Test creating a valid admin scrape request."""
-        from src.models import AdminScrapeRequest
-        
         request = AdminScrapeRequest(
             order_id="12345678901234",
             order_name="#1234",
@@ -69,12 +72,31 @@ class TestAdminScrapeRequest:
         
         assert request.order_id == "12345678901234"
         assert request.order_name == "#1234"
-        assert request.order_date == "2026-01-22"
+        assert request.order_date == datetime(2026, 1, 22)
+
+    def test_order_date_parsed_with_timezone(self):
+        """Test that ISO timestamps are parsed once into aware datetimes."""
+        request = AdminScrapeRequest(order_id="1", order_date="2026-01-21T23:30:00Z")
+        
+        assert request.order_date == datetime(2026, 1, 21, 23, 30, tzinfo=timezone.utc)
+
+    def test_blank_order_date_is_none(self):
+        """Test that an empty order date falls back to None instead of failing."""
+        assert AdminScrapeRequest(order_id="1", order_date="").order_date is None
+
+    def test_compact_iso_order_date(self):
+        """Test that a compact ISO date is parsed as a date, not a Unix timestamp."""
+        request = AdminScrapeRequest(order_id="1", order_date="20260122")
+        
+        assert request.order_date == datetime(2026, 1, 22)
+
+    def test_invalid_order_date_rejected(self):
+        """Test that malformed order dates fail validation."""
+        with pytest.raises(ValidationError):
+            AdminScrapeRequest(order_id="1", order_date="not-a-date")
 
     def test_minimal_request(self):
         """Test request with only required fields."""
-        from src.models import AdminScrapeRequest
-        
         request = AdminScrapeRequest(order_id="12345678901234")
         
         assert request.order_id == "12345678901234"
@@ -87,8 +109,6 @@ class TestSessionStatus:
 
     def test_status_values(self):
         """Test that all expected status values exist."""
-        from src.models import SessionStatus
-        
         assert SessionStatus.UNKNOWN.value == "unknown"
         assert SessionStatus.LOGGED_IN.value == "logged_in"
         assert SessionStatus.LOGGED_OUT.value == "logged_out"
@@ -100,8 +120,6 @@ class TestSessionStatusResponse:
 
     def test_logged_in_response(self):
         """Test logged in status response."""
-        from src.models import SessionStatusResponse, SessionStatus
-        
         response = SessionStatusResponse(
             status=SessionStatus.LOGGED_IN,
             store_slug="test-store",
@@ -113,8 +131,6 @@ class TestSessionStatusResponse:
 
     def test_login_required_response(self):
         """Test login required status response."""
-        from src.models import SessionStatusResponse, SessionStatus
-        
         response = SessionStatusResponse(
             status=SessionStatus.LOGIN_REQUIRED,
             store_slug="test-store",
@@ -130,8 +146,6 @@ class TestBatchScrapeRequest:
 
     def test_batch_request(self):
         """Test creating a batch scrape request."""
-        from src.models import BatchScrapeRequest, AdminScrapeRequest
-        
         request = BatchScrapeRequest(
             orders=[
                 AdminScrapeRequest(order_id="111", order_name="#1"),
@@ -148,8 +162,6 @@ class TestBatchScrapeResult:
 
     def test_batch_result(self):
         """Test creating a batch scrape result."""
-        from src.models import BatchScrapeResult, ScrapeResult
-        
         result = BatchScrapeResult(
             total=2,
             successful=1,
@@ -1,137 +1,162 @@
 """Tests for scraper utility functions."""
+import asyncio
 import pytest
-from datetime import datetime
-from zoneinfo import ZoneInfo
-from unittest.mock import patch, MagicMock, AsyncMock
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch, AsyncMock
+
+from src import scraper
+from src.config import Settings, settings
+from src.models import AdminScrapeRequest, ScrapeResult, SessionStatus
+from src.scraper import (
+    parse_german_date,
+    get_order_date_folder,
+    _get_timezone,
+    cancel_scraping,
+    is_cancelled,
+    reset_cancel,
+    get_session_status,
+    set_session_status,
+    check_login_status,
+    signal_login_complete,
+    ensure_logged_in,
+    human_delay,
+    scrape_admin_invoice,
+    scrape_invoice_with_retry,
+    scrape_many,
+    close_browser,
+    _acquire_page,
+    _release_page,
+    _scan_order_html,
+    _save_screenshot,
+)
 
 
 class TestParseGermanDate:
     """Test German date parsing function."""
 
-    def test_standard_format_with_period(self):
+    @pytest.mark.parametrize("input_date,expected", [
+        ("21. Jan. 2026", "2026-01-21"),
+        ("15. Dez. 2025", "2025-12-15"),
+        ("5. Mär. 2026", "2026-03-05"),
+    ])
+    def test_standard_format_with_period(self, input_date, expected):
         """Test standard German date format with period after month."""
-        from src.scraper import parse_german_date
-        
-        assert parse_german_date("21. Jan. 2026") == "2026-01-21"
-        assert parse_german_date("15. Dez. 2025") == "2025-12-15"
-        assert parse_german_date("5. Mär. 2026") == "2026-03-05"
+        assert parse_german_date(input_date) == expected
 
     def test_format_without_period(self):
         """Test German date format without period after month."""
-        from src.scraper import parse_german_date
-        
         assert parse_german_date("1. Mai 2026") == "2026-05-01"
         assert parse_german_date("21. Jan 2026") == "2026-01-21"
 
-    def test_all_german_months(self):
+    @pytest.mark.parametrize("input_date,expected", [
+        ("1. Jan. 2026", "2026-01-01"),
+        ("1. Jän. 2026", "2026-01-01"),  # Austrian
+        ("1. Feb. 2026", "2026-02-01"),
+        ("1. Mär. 2026", "2026-03-01"),
+        ("1. Mar. 2026", "2026-03-01"),  # Alternative
+        ("1. Apr. 2026", "2026-04-01"),
+        ("1. Mai 2026", "2026-05-01"),
+        ("1. May 2026", "2026-05-01"),   # English
+        ("1. Jun. 2026", "2026-06-01"),
+        ("1. Jul. 2026", "2026-07-01"),
+        ("1. Aug. 2026", "2026-08-01"),
+        ("1. Sep. 2026", "2026-09-01"),
+        ("1. Okt. 2026", "2026-10-01"),
+        ("1. Oct. 2026", "2026-10-01"),  # English
+        ("1. Nov. 2026", "2026-11-01"),
+        ("1. Dez. 2026", "2026-12-01"),
+        ("1. Dec. 2026", "2026-12-01"),  # English
+    ])
+    def test_all_german_months(self, input_date, expected):
         """Test all German month abbreviations."""
-        from src.scraper import parse_german_date
-        
-        test_cases = [
-            ("1. Jan. 2026", "2026-01-01"),
-            ("1. Jän. 2026", "2026-01-01"),  # Austrian
-            ("1. Feb. 2026", "2026-02-01"),
-            ("1. Mär. 2026", "2026-03-01"),
-            ("1. Mar. 2026", "2026-03-01"),  # Alternative
-            ("1. Apr. 2026", "2026-04-01"),
-            ("1. Mai 2026", "2026-05-01"),
-            ("1. May 2026", "2026-05-01"),   # English
-            ("1. Jun. 2026", "2026-06-01"),
-            ("1. Jul. 2026", "2026-07-01"),
-            ("1. Aug. 2026", "2026-08-01"),
-            ("1. Sep. 2026", "2026-09-01"),
-            ("1. Okt. 2026", "2026-10-01"),
-            ("1. Oct. 2026", "2026-10-01"),  # English
-            ("1. Nov. 2026", "2026-11-01"),
-            ("1. Dez. 2026", "2026-12-01"),
-            ("1. Dec. 2026", "2026-12-01"),  # English
-        ]
-        
-        for input_date, expected in test_cases:
-            assert parse_german_date(input_date) == expected, f"Failed for {input_date}"
-
-    def test_single_digit_day(self):
+        assert parse_german_date(input_date) == expected
+
+    @pytest.mark.parametrize("input_date,expected", [
+        ("5. Jan. 2026", "2026-01-05"),
+        ("1. Mär 2026", "2026-03-01"),
+    ])
+    def test_single_digit_day(self, input_date, expected):
         """Test single digit day numbers."""
-        from src.scraper import parse_german_date
-        
-        assert parse_german_date("5. Jan. 2026") == "2026-01-05"
-        assert parse_german_date("1. Mär 2026") == "2026-03-01"
+        assert parse_german_date(input_date) == expected
 
-    def test_double_digit_day(self):
+    @pytest.mark.parametrize("input_date,expected", [
+        ("15. Jan. 2026", "2026-01-15"),
+        ("31. Dez. 2025", "2025-12-31"),
+    ])
+    def test_double_digit_day(self, input_date, expected):
         """Test double digit day numbers."""
-        from src.scraper import parse_german_date
-        
-        assert parse_german_date("15. Jan. 2026") == "2026-01-15"
-        assert parse_german_date("31. Dez. 2025") == "2025-12-31"
-
-    def test_invalid_date_returns_none(self):
+        assert parse_german_date(input_date) == expected
+
+    @pytest.mark.parametrize("input_date", [
+        "invalid",
+        "",
+        "2026-01-21",  # ISO format not supported
+        "January 21, 2026",  # English format
+    ])
+    def test_invalid_date_returns_none(self, input_date):
         """Test that invalid dates return None."""
-        from src.scraper import parse_german_date
-        
-        assert parse_german_date("invalid") is None
-        assert parse_german_date("") is None
-        assert parse_german_date("2026-01-21") is None  # ISO format not supported
-        assert parse_german_date("January 21, 2026") is None  # English format
+        assert parse_german_date(input_date) is None
 
-    def test_case_insensitive(self):
+    @pytest.mark.parametrize("input_date", ["21. JAN. 2026", "21. jan. 2026", "21. JaN. 2026"])
+    def test_case_insensitive(self, input_date):
         """Test that month matching is case insensitive."""
-        from src.scraper import parse_german_date
-        
-        assert parse_german_date("21. JAN. 2026") == "2026-01-21"
-        assert parse_german_date("21. jan. 2026") == "2026-01-21"
-        assert parse_german_date("21. JaN. 2026") == "2026-01-21"
+        assert parse_german_date(input_date) == "2026-01-21"
 
     def test_date_embedded_in_text(self):
         """Test extracting date from longer text."""
-        from src.scraper import parse_german_date
-        
         text = "Rechnungsdatum: 21. Jan. 2026 - Vielen Dank"
         assert parse_german_date(text) == "2026-01-21"
 
+    def test_non_month_words_are_skipped(self):
+        """Test that "<day>. <word> <year>" with an unknown word is not taken as a date."""
+        assert parse_german_date("Schritt 2. Bestellung 2024, 21. Jan. 2026") == "2026-01-21"
+
 
 class TestGetOrderDateFolder:
     """Test order date folder generation."""
 
     def test_iso_date_string(self):
         """Test with ISO format date string."""
-        from src.scraper import get_order_date_folder
-        
         # UTC midnight -> Vienna is UTC+1 in winter
         result = get_order_date_folder("2026-01-22T00:00:00+00:00")
         assert result == "2026-01-22"
 
     def test_utc_z_suffix(self):
         """Test with Z suffix for UTC."""
-        from src.scraper import get_order_date_folder
-        
         result = get_order_date_folder("2026-01-22T10:30:00Z")
         assert result == "2026-01-22"
 
     def test_late_utc_stays_same_day_in_utc(self):
         """Test that late UTC times stay same day in UTC (default timezone)."""
-        from src.scraper import get_order_date_folder
-        
         # With default UTC timezone, 23:30 UTC on Jan 21 stays Jan 21
         result = get_order_date_folder("2026-01-21T23:30:00Z")
         assert result == "2026-01-21"
 
+    def test_configured_timezone_shifts_date(self):
+        """Test that non-UTC timezones still convert to the local calendar day."""
+        with patch("src.scraper.settings", Settings(timezone="Europe/Vienna")):
+            result = get_order_date_folder("2026-01-21T23:30:00Z")
+        
+        # 23:30 UTC is 00:30 the next day in Vienna (UTC+1 in winter)
+        assert result == "2026-01-22"
+
+    def test_datetime_object(self):
+        """Test with an already parsed datetime from the request model."""
+        result = get_order_date_folder(datetime(2026, 1, 22, 10, 30, tzinfo=timezone.utc))
+        assert result == "2026-01-22"
+
     def test_none_returns_today(self):
         """Test that None returns today's date."""
-        from src.scraper import get_order_date_folder
-        from src.config import settings
-        
         result = get_order_date_folder(None)
-        from src.scraper import _get_timezone
         tz = _get_timezone()
         expected = datetime.now(tz).strftime('%Y-%m-%d')
         assert result == expected
 
     def test_invalid_date_returns_today(self):
         """Test that invalid date returns today's date."""
-        from src.scraper import get_order_date_folder
-        
         result = get_order_date_folder("not-a-date")
-        tz = ZoneInfo("Europe/Vienna")
+        tz = _get_timezone()
         expected = datetime.now(tz).strftime('%Y-%m-%d')
         assert result == expected
 
@@ -139,15 +164,13 @@ class TestGetOrderDateFolder:
 class TestCancellationFlags:
     """Test scraping cancellation functions."""
 
-    def test_cancel_and_check(self):
+    def test_cancel_and_check(self, cancel_state):
         """Test cancellation flag setting and checking."""
-        from src.scraper import cancel_scraping, is_cancelled, reset_cancel
-        
-        reset_cancel()
         assert is_cancelled() is False
         
         cancel_scraping()
         assert is_cancelled() is True
+        assert cancel_state.cancel_requested is True
         
         reset_cancel()
         assert is_cancelled() is False
@@ -158,9 +181,6 @@ class TestSessionStatus:
 
     def test_get_and_set_session_status(self):
         """Test session status get/set functions."""
-        from src.scraper import get_session_status, set_session_status
-        from src.models import SessionStatus
-        
         set_session_status(SessionStatus.LOGGED_IN)
         assert get_session_status() == SessionStatus.LOGGED_IN
         
@@ -172,37 +192,254 @@ class TestCheckLoginStatus:
     """Test login status detection."""
 
     @pytest.mark.asyncio
-    async def test_login_page_detected(self):
-        """Test detection of login page redirect."""
-        from src.scraper import check_login_status
+    @pytest.mark.parametrize("url", [
+        "https://accounts.shopify.com/login",  # Login page redirect
+        "https://accounts.shopify.com/oauth/authorize?client_id=...",  # OAuth redirect
+        "https://identity.shopify.com/...",  # Identity page redirect
+    ])
+    async def test_logged_out_urls_detected(self, url):
+        """Test detection of login, OAuth and identity redirects."""
+        mock_page = SimpleNamespace(url=url)
         
-        mock_page = MagicMock()
-        mock_page.url = "https://accounts.shopify.com/login"
+        assert await check_login_status(mock_page) is False
+
+    @pytest.mark.asyncio
+    async def test_admin_url_skips_dom_wait(self, mock_browser_context):
+        """Test that a store admin URL is accepted without waiting for the DOM."""
+        _, mock_page = mock_browser_context
         
         result = await check_login_status(mock_page)
-        assert result is False
+        assert result is True
+        mock_page.locator.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_oauth_redirect_detected(self):
-        """Test detection of OAuth redirect."""
-        from src.scraper import check_login_status
+    async def test_admin_auth_url_without_admin_ui_is_logged_out(self, mock_browser_context):
+        """Test that an admin /auth URL is not treated as logged in when no admin UI appears."""
+        _, mock_page = mock_browser_context
+        mock_page.url = "https://admin.shopify.com/store/test-store/auth/callback"
+        mock_page.locator.return_value.first.wait_for = AsyncMock(side_effect=TimeoutError())
         
-        mock_page = MagicMock()
-        mock_page.url = "https://accounts.shopify.com/oauth/authorize?client_id=..."
+        assert await check_login_status(mock_page) is False
+
+
+class TestPagePool:
+    """Test browser page pooling."""
+
+    @pytest.mark.asyncio
+    async def test_released_page_is_reused(self, mock_browser_context):
+        """Test that a released page is handed out again instead of opening a new one."""
+        context, page = mock_browser_context
+        with patch("src.scraper.get_browser_context", AsyncMock(return_value=context)):
+            first = await _acquire_page()
+            await _release_page(first)
+            second = await _acquire_page()
+            await _release_page(second)
         
-        result = await check_login_status(mock_page)
-        assert result is False
+        assert second is first
+        context.new_page.assert_awaited_once()
+        await close_browser()
 
     @pytest.mark.asyncio
-    async def test_identity_page_detected(self):
-        """Test detection of identity page redirect."""
-        from src.scraper import check_login_status
+    async def test_page_recycled_after_limit(self, mock_browser_context):
+        """Test that a page is closed once it served page_recycle_after orders."""
+        context, page = mock_browser_context
+        with patch("src.scraper.get_browser_context", AsyncMock(return_value=context)):
+            for _ in range(settings.page_recycle_after):
+                await _release_page(await _acquire_page())
         
-        mock_page = MagicMock()
-        mock_page.url = "https://identity.shopify.com/..."
+        page.close.assert_awaited_once()
+        await close_browser()
+
+
+class TestScanOrderHtml:
+    """Test the single-pass HTML fallback scan."""
+
+    def test_pdf_link_preferred_over_earlier_legacy_link(self):
+        """Test that a download link wins even if a legacy link comes first."""
+        html = (
+            '<a href="/o/1/tax_invoices/ab">old</a> INV-AT-9 <span>3. mär. 2025</span>'
+            '<a href="/o/1/tax_invoices/ab-1/download/vat_invoice_INV-AT-9.pdf">PDF</a>'
+        )
         
-        result = await check_login_status(mock_page)
-        assert result is False
+        assert _scan_order_html(html) == (
+            "/o/1/tax_invoices/ab-1/download/vat_invoice_INV-AT-9.pdf", "INV-AT-9", "2025-03-03"
+        )
+
+    def test_nothing_found(self):
+        """Test that a page without invoice data yields all None."""
+        assert _scan_order_html("<div>Order #1</div>") == (None, None, None)
+
+
+class TestScrapeMany:
+    """Test concurrent batch scraping."""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        """Test that no more than `concurrency` orders run at once."""
+        running = 0
+        peak = 0
+        
+        async def fake_scrape(order_id, order_name=None, order_date=None):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return ScrapeResult(success=True, shopify_order_id=order_id)
+        
+        orders = [AdminScrapeRequest(order_id=str(i)) for i in range(6)]
+        with patch("src.scraper.scrape_invoice_with_retry", side_effect=fake_scrape):
+            results = await scrape_many(orders, concurrency=2)
+        
+        assert peak == 2
+        assert [r.shopify_order_id for r in results] == [str(i) for i in range(6)]
+
+    @pytest.mark.asyncio
+    async def test_exception_becomes_failed_result(self):
+        """Test that an unexpected error is reported as a failed result."""
+        with patch("src.scraper.scrape_invoice_with_retry", AsyncMock(side_effect=RuntimeError("boom"))):
+            results = await scrape_many([AdminScrapeRequest(order_id="1")], concurrency=1)
+        
+        assert results[0].success is False
+        assert results[0].error == "boom"
+
+
+class TestResultCache:
+    """Test that successful results are not scraped twice."""
+
+    @pytest.mark.asyncio
+    async def test_repeat_order_served_from_cache(self, tmp_path):
+        """Test that a downloaded order is not scraped again while its file exists."""
+        pdf = tmp_path / "INV-DE-7.pdf"
+        pdf.write_bytes(b"%PDF-1.4")
+        result = ScrapeResult(success=True, shopify_order_id="123", filepath=str(pdf))
+        
+        with patch("src.scraper.scrape_admin_invoice", AsyncMock(return_value=result)) as mock_scrape:
+            first = await scrape_invoice_with_retry("123")
+            second = await scrape_invoice_with_retry("123")
+        
+        assert first is second
+        mock_scrape.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_deleted_file_is_scraped_again(self, tmp_path):
+        """Test that a cached result is dropped once its PDF is gone."""
+        pdf = tmp_path / "INV-DE-7.pdf"
+        pdf.write_bytes(b"%PDF-1.4")
+        result = ScrapeResult(success=True, shopify_order_id="123", filepath=str(pdf))
+        
+        with patch("src.scraper.scrape_admin_invoice", AsyncMock(return_value=result)) as mock_scrape:
+            await scrape_invoice_with_retry("123")
+            pdf.unlink()
+            await scrape_invoice_with_retry("123")
+        
+        assert mock_scrape.await_count == 2
+
+
+class TestScrapeAdminInvoice:
+    """Test the admin order page scraping flow with a mocked page."""
+
+    ORDER_HTML = (
+        '<div class="Polaris-Page">'
+        '<a href="/store/test-store/orders/123/tax_invoices/ab-12/download/vat_invoice_INV-DE-7.pdf">PDF</a>'
+        '<span>21. Jan. 2026</span></div>'
+    )
+
+    ORDER_DATA = {
+        "href": "/store/test-store/orders/123/tax_invoices/ab-12/download/vat_invoice_INV-DE-7.pdf",
+        "invoiceNumber": None,
+        "date": ["21", "Jan", "2026"],
+    }
+
+    async def _scrape(self, page, tmp_path):
+        local_settings = Settings(download_dir=str(tmp_path), screenshot_dir=str(tmp_path))
+        with patch("src.scraper.settings", local_settings), \
+             patch("src.scraper._acquire_page", AsyncMock(return_value=page)), \
+             patch("src.scraper.human_delay", AsyncMock()):
+            return await scrape_admin_invoice("123", "#1", "2026-01-22T10:00:00Z")
+
+    @pytest.mark.asyncio
+    async def test_downloads_invoice_pdf(self, mock_browser_context, tmp_path):
+        """Test that the invoice link is found in the DOM and the PDF saved to the date folder."""
+        _, page = mock_browser_context
+        page.evaluate.return_value = self.ORDER_DATA
+        
+        result = await self._scrape(page, tmp_path)
+        
+        assert result.success is True, result.error
+        assert result.invoice_number == "INV-DE-7"
+        assert result.invoice_date == "2026-01-21"
+        page.content.assert_not_awaited()
+        page.wait_for_load_state.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_page_html(self, mock_browser_context, tmp_path):
+        """Test that the raw HTML is scanned when the DOM query finds no link."""
+        _, page = mock_browser_context
+        page.content.return_value = self.ORDER_HTML
+        
+        result = await self._scrape(page, tmp_path)
+        
+        assert result.success is True, result.error
+        assert result.invoice_number == "INV-DE-7"
+        assert result.invoice_uuid == "ab-12"
+        assert result.invoice_date == "2026-01-21"
+        assert (tmp_path / "2026-01-22" / "INV-DE-7.pdf").read_bytes().startswith(b"%PDF")
+        page.context.request.get.return_value.dispose.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_login_redirect_detected_before_content_wait(self, mock_browser_context, tmp_path):
+        """Test that an expired session returns needs_login without waiting for order content."""
+        _, page = mock_browser_context
+        page.url = "https://accounts.shopify.com/lookup?rid=1"
+        
+        result = await self._scrape(page, tmp_path)
+        
+        assert result.needs_login is True
+        page.wait_for_selector.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_rejects_non_pdf_content(self, mock_browser_context, tmp_path):
+        """Test that a non-PDF body is reported and not written to disk."""
+        _, page = mock_browser_context
+        page.evaluate.return_value = self.ORDER_DATA
+        page.context.request.get.return_value.body.return_value = b"<html>login</html>"
+        
+        result = await self._scrape(page, tmp_path)
+        
+        assert result.success is False
+        assert "not a valid PDF" in result.error
+        assert not (tmp_path / "2026-01-22" / "INV-DE-7.pdf").exists()
+
+
+class TestSaveScreenshot:
+    """Test debug screenshot handling."""
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self, mock_browser_context):
+        """Test that screenshots are skipped unless enabled."""
+        _, page = mock_browser_context
+        
+        assert await _save_screenshot(page, "failed") == ""
+        page.screenshot.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_enabled_saves_viewport_jpeg(self, mock_browser_context, tmp_path):
+        """Test that enabled screenshots are viewport-only JPEGs."""
+        _, page = mock_browser_context
+        local_settings = Settings(debug_screenshots=True, screenshot_dir=str(tmp_path))
+        
+        with patch("src.scraper.settings", local_settings), \
+             patch("src.scraper._SCREENSHOT_DIR", tmp_path):
+            filepath = await _save_screenshot(page, "failed")
+            second = await _save_screenshot(page, "failed")
+        
+        assert filepath.endswith(".jpg")
+        assert filepath.startswith(str(tmp_path))
+        assert second != filepath
+        kwargs = page.screenshot.call_args.kwargs
+        assert kwargs["type"] == "jpeg"
+        assert kwargs["full_page"] is False
 
 
 class TestLoginCompleteSignal:
@@ -210,11 +447,62 @@ class TestLoginCompleteSignal:
 
     def test_signal_login_complete_exists(self):
         """Test that login complete signal function exists."""
-        from src.scraper import signal_login_complete
-        
         # Just verify the function exists and is callable
         assert callable(signal_login_complete)
 
+    @pytest.fixture
+    def login_context(self, mock_browser_context):
+        """Browser context whose page sits on the login screen and never reaches the admin."""
+        async def never_reaches_admin(*args, **kwargs):
+            await asyncio.sleep(3600)
+        
+        context, page = mock_browser_context
+        page.url = "https://accounts.shopify.com/login"
+        page.wait_for_url = never_reaches_admin
+        return context
+
+    @pytest.mark.asyncio
+    async def test_login_wait_ends_on_signal(self, login_context):
+        """Test that waiting for manual login returns as soon as it is signalled."""
+        with patch("src.scraper.get_browser_context", AsyncMock(return_value=login_context)):
+            task = asyncio.create_task(ensure_logged_in())
+            await asyncio.sleep(0.05)
+            signal_login_complete()
+            result = await asyncio.wait_for(task, timeout=2)
+        
+        assert result == (True, None)
+
+    @pytest.mark.asyncio
+    async def test_login_wait_ends_on_cancel(self, login_context):
+        """Test that waiting for manual login stops when cancelled."""
+        with patch("src.scraper.get_browser_context", AsyncMock(return_value=login_context)):
+            task = asyncio.create_task(ensure_logged_in())
+            await asyncio.sleep(0.05)
+            cancel_scraping()
+            result = await asyncio.wait_for(task, timeout=2)
+        
+        assert result == (False, "Cancelled by user")
+
+    @pytest.mark.asyncio
+    async def test_login_wait_reports_page_errors(self, login_context):
+        """Test that a closed login tab is reported as such, not as a timeout."""
+        context = login_context
+        context.new_page.return_value.wait_for_url = AsyncMock(side_effect=RuntimeError("Target page has been closed"))
+        
+        with patch("src.scraper.get_browser_context", AsyncMock(return_value=context)):
+            result = await asyncio.wait_for(ensure_logged_in(), timeout=2)
+        
+        assert result == (False, "Target page has been closed")
+
+    @pytest.mark.asyncio
+    async def test_url_wait_timeout_reported_as_timeout(self, cancel_state, mock_browser_context):
+        """Test that a timed-out URL wait still maps to the "timeout" outcome."""
+        cancel_state.login_event = asyncio.Event()
+        _, page = mock_browser_context
+        page.wait_for_url = AsyncMock(side_effect=TimeoutError("Timeout 1000ms exceeded"))
+        
+        assert await scraper._wait_for_login(page, 1) == "timeout"
+
 
 class TestHumanDelay:
     """Test human-like delay functionality."""
@@ -222,16 +510,33 @@ class TestHumanDelay:
     @pytest.mark.asyncio
     async def test_human_delay_exists(self):
         """Test that human_delay function exists and is async."""
-        from src.scraper import human_delay
-        import asyncio
-        
         # Should complete without error
         await human_delay("test")
 
     def test_delay_config_values(self):
         """Test that delay config values are reasonable."""
-        from src.config import settings
-        
         assert settings.human_delay_min >= 0
         assert settings.human_delay_max > settings.human_delay_min
         assert settings.human_delay_max <= 10  # Sanity check - not too long
+
+    @pytest.mark.asyncio
+    async def test_delay_clamped_to_bounds(self):
+        """Test that log-normal draws are clamped to [min, max]."""
+        with patch("src.scraper.random.lognormvariate", return_value=100.0), \
+             patch("src.scraper.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            await human_delay("test")
+        
+        mock_sleep.assert_awaited_once_with(settings.human_delay_max)
+
+    @pytest.mark.asyncio
+    async def test_long_break_after_countdown(self):
+        """Test that a long break is added once the call countdown runs out."""
+        scraper.reset_cancel()
+        with patch("src.scraper.random.lognormvariate", return_value=1.0), \
+             patch("src.scraper.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            for _ in range(scraper.STATE.next_long_break):
+                await scraper.human_delay("test")
+        
+        delays = [call.args[0] for call in mock_sleep.await_args_list]
+        assert all(d == 1.0 for d in delays[:-1])
+        assert delays[-1] >= 1.0 + scraper._LONG_BREAK_SECONDS[0]